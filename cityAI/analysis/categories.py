@@ -0,0 +1,82 @@
+import json
+import os
+import tempfile
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+
+from analysis.text_features import hash_vectorize
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+SEED_FILE = DATA_DIR / "service_categories.json"
+COUNTS_FILE = DATA_DIR / "category_counts.json"
+OTHER = "Other"
+
+
+class CategoryClassifier:
+    """Nearest-centroid service classifier over hashed n-gram features.
+
+    Each category's centroid is the mean feature vector of its seed phrases
+    in data/service_categories.json. Queries whose best cosine similarity is
+    below ``threshold`` are labelled "Other".
+    """
+
+    def __init__(self, seed_file=SEED_FILE, threshold=0.15):
+        with open(seed_file, "r") as f:
+            seeds = json.load(f)
+        self.labels = list(seeds)
+        centroids = np.stack([hash_vectorize(seeds[label]).mean(axis=0) for label in self.labels])
+        norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+        self.centroids = centroids / np.where(norms > 0, norms, 1.0)
+        self.threshold = threshold
+
+    def classify_batch(self, texts: list) -> list:
+        if not texts:
+            return []
+        scores = hash_vectorize(texts) @ self.centroids.T
+        best = scores.argmax(axis=1)
+        best_scores = scores[np.arange(len(texts)), best]
+        return [
+            self.labels[index] if score >= self.threshold else OTHER
+            for index, score in zip(best, best_scores)
+        ]
+
+    def classify(self, text: str) -> str:
+        return self.classify_batch([text])[0]
+
+
+def load_category_counts(counts_file=COUNTS_FILE) -> dict:
+    if not os.path.exists(counts_file):
+        return {}
+    with open(counts_file, "r") as f:
+        return json.load(f)
+
+
+def save_category_counts(counts: dict, counts_file=COUNTS_FILE):
+    counts_file = Path(counts_file)
+    fd, tmp_path = tempfile.mkstemp(dir=counts_file.parent, prefix=counts_file.name, suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        json.dump(counts, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, counts_file)
+
+
+def count_categories(records: list, classifier: CategoryClassifier) -> dict:
+    """Per-category counts over ``records``; unlabelled ones are classified on the fly."""
+    unlabelled = [r.get("user_query", "") for r in records if not r.get("category")]
+    counts = Counter(r["category"] for r in records if r.get("category"))
+    counts.update(classifier.classify_batch(unlabelled))
+    return dict(counts)
+
+
+def add_category_counts(categories: list, counts_file=COUNTS_FILE) -> dict:
+    """Increment the per-category counters kept alongside the history.
+
+    Callers must hold the interaction store lock so counter updates are not
+    lost between concurrent writers.
+    """
+    counts = load_category_counts(counts_file)
+    for category in categories:
+        counts[category] = counts.get(category, 0) + 1
+    save_category_counts(counts, counts_file)
+    return counts
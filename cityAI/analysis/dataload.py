@@ -0,0 +1,119 @@
+import json
+import os
+
+import pandas as pd
+
+from services.textcodec import TextCodec
+
+TEXT_COLUMNS = ("user_query", "reply")
+CATEGORICAL_COLUMNS = ("sentiment", "user_rating", "category")
+DEFAULT_COLUMNS = ("seq", "id", "timestamp", "sentiment", "user_rating", "category")
+DEFAULT_LABELS = {"sentiment": "NEUTRAL", "user_rating": "NEUTRAL", "category": "Other"}
+
+
+def compact_frame(records: list, columns=DEFAULT_COLUMNS, start_seq: int = 0) -> pd.DataFrame:
+    """Project interaction records onto ``columns`` with compact dtypes.
+
+    ``seq`` is the record's position in the append-only history and is the
+    key used to fetch its text later. Labels are upper-cased categoricals
+    and timestamps are datetime64, so a frame without the text columns costs
+    a few bytes per row.
+    """
+    data = {}
+    for column in columns:
+        if column == "seq":
+            data[column] = pd.RangeIndex(start_seq, start_seq + len(records))
+        else:
+            data[column] = [record.get(column) for record in records]
+    df = pd.DataFrame(data)
+
+    if "timestamp" in df:
+        df["timestamp"] = pd.to_datetime(df["timestamp"], format="ISO8601", errors="coerce")
+    for column in CATEGORICAL_COLUMNS:
+        if column in df:
+            labels = df[column].fillna(DEFAULT_LABELS[column]).astype(str)
+            if column != "category":
+                labels = labels.str.upper()
+            df[column] = labels.astype("category")
+    return df
+
+
+def append_frames(cached: pd.DataFrame, delta: pd.DataFrame) -> pd.DataFrame:
+    """Concatenate two compact frames, keeping categorical dtypes."""
+    if cached is None or cached.empty:
+        return delta
+    if delta.empty:
+        return cached
+    for column in CATEGORICAL_COLUMNS:
+        if column in cached and column in delta:
+            categories = cached[column].cat.categories.union(delta[column].cat.categories)
+            cached[column] = cached[column].cat.set_categories(categories)
+            delta[column] = delta[column].cat.set_categories(categories)
+    return pd.concat([cached, delta], ignore_index=True)
+
+
+def set_labels(df: pd.DataFrame, column: str, labels_by_id: dict) -> pd.DataFrame:
+    """Overwrite a categorical column for the rows whose id is in ``labels_by_id``."""
+    if df.empty or not labels_by_id:
+        return df
+    new_labels = [str(label).upper() for label in labels_by_id.values()]
+    df[column] = df[column].cat.add_categories(
+        [label for label in set(new_labels) if label not in df[column].cat.categories]
+    )
+    mask = df["id"].isin(labels_by_id.keys())
+    df.loc[mask, column] = df.loc[mask, "id"].map(labels_by_id).str.upper()
+    return df
+
+
+def load_records(path, decode=True) -> list:
+    """Parsed history; compressed text is decoded unless ``decode`` is False."""
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return []
+    with open(path, "r") as f:
+        data = json.load(f)
+    if not isinstance(data, list):
+        raise ValueError(f"{path} does not contain a list of interactions")
+    return TextCodec().decode_records(data) if decode else data
+
+
+def load_interactions(path, columns=DEFAULT_COLUMNS) -> pd.DataFrame:
+    """Read only ``columns`` of the history file into a compact frame.
+
+    The parsed records (including their text) are dropped as soon as the
+    projection is built; compressed text is never decoded.
+    """
+    return compact_frame(load_records(path, decode=any(c in TEXT_COLUMNS for c in columns)), columns)
+
+
+def load_text(path, seqs=None) -> pd.DataFrame:
+    """Query and reply text for the given ``seq`` positions (all rows if None)."""
+    records = load_records(path, decode=False)
+    positions = range(len(records)) if seqs is None else [s for s in seqs if 0 <= s < len(records)]
+    codec = TextCodec()
+    return pd.DataFrame(
+        [{"seq": s, **{c: codec.decode(records[s].get(c)) for c in TEXT_COLUMNS}} for s in positions],
+        columns=["seq", *TEXT_COLUMNS],
+    )
+
+
+def search_text(records: list, query: str) -> list:
+    """``seq`` of records whose query or reply contains ``query`` (case-insensitive)."""
+    needle = query.lower()
+    return [
+        seq for seq, record in enumerate(records)
+        if any(needle in str(record.get(column) or "").lower() for column in TEXT_COLUMNS)
+    ]
+
+
+def memory_report(records: list) -> dict:
+    """Bytes used by a naive full DataFrame versus the compact projection."""
+    full = pd.DataFrame(records)
+    for column in ("sentiment", "user_rating"):
+        if column in full:
+            full[column] = full[column].fillna("NEUTRAL").astype(str)
+    compact = compact_frame(records)
+    return {
+        "rows": len(records),
+        "full_bytes": int(full.memory_usage(deep=True).sum()),
+        "compact_bytes": int(compact.memory_usage(deep=True).sum()),
+    }
@@ -10,3 +10,11 @@ def analyze_sentiment(text: str) -> str:
         return "Negative"
     else:
         return "Neutral"
+
+def analyze_sentiment_batch(texts: list) -> list:
+    """Analyze sentiment for many texts, reusing one label per distinct text."""
+    labels = {}
+    for text in texts:
+        if text not in labels:
+            labels[text] = analyze_sentiment(text)
+    return [labels[text] for text in texts]
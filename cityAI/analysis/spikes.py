@@ -0,0 +1,225 @@
+import json
+import math
+import os
+import tempfile
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+STATE_FILE = DATA_DIR / "spike_state.json"
+ALL = "All"
+
+
+class SeriesState:
+    """EWMA baseline and one-sided CUSUM for one stream of window counts."""
+
+    def __init__(self, window=None):
+        self.window = window  # index of the window being counted
+        self.total = 0
+        self.negative = 0
+        self.mean = 0.0
+        self.var = 0.0
+        self.cusum = 0.0
+        self.windows = 0  # closed windows seen
+        self.alarm = False
+        self.alarm_since = None
+
+    def to_dict(self) -> dict:
+        return dict(vars(self))
+
+    @classmethod
+    def from_dict(cls, data):
+        state = cls()
+        vars(state).update(data)
+        return state
+
+
+class SpikeDetector:
+    """Online detector for surges in negative interactions.
+
+    Interactions are counted in fixed windows of ``window_minutes``, overall
+    and (with ``per_category``) per service category. When a window closes,
+    its negative count ``x`` is compared with an EWMA baseline (mean and
+    variance, smoothing ``alpha``) and folded into a one-sided CUSUM
+    ``S = max(0, S + z - k)`` with ``z = (x - mean) / sd``; the series is in
+    alarm while ``S > h``; ``S`` is capped at ``1.5 * h`` so an alarm clears
+    within a few windows once the surge is over. An alarm is only raised on
+    a window with at least ``min_negative`` negatives, and until ``warmup``
+    windows have been seen the baseline is only learned. Each ``add`` is
+    O(1): a counter increment, plus closing the previous window(s) when a
+    new window starts; long gaps are folded into at most ``max_gap`` empty
+    windows.
+
+    Windows closed while in alarm are not folded into the baseline, so a
+    sustained surge keeps alarming instead of becoming the new normal.
+    """
+
+    def __init__(self, window_minutes=60, alpha=0.1, k=0.5, h=4.0, warmup=24,
+                 min_negative=3, min_sd=1.0, per_category=True, max_gap=168, history=50):
+        self.window_minutes = window_minutes
+        self.alpha = alpha
+        self.k = k
+        self.h = h
+        self.warmup = warmup
+        self.min_negative = min_negative
+        self.min_sd = min_sd
+        self.per_category = per_category
+        self.max_gap = max_gap
+        self.series = {}
+        self.alerts = deque(maxlen=history)
+
+    # ----------------------------------------------
+    # Updates
+    # ----------------------------------------------
+    def window_of(self, timestamp) -> int:
+        if isinstance(timestamp, str):
+            timestamp = datetime.fromisoformat(timestamp)
+        return int(timestamp.timestamp() // (self.window_minutes * 60))
+
+    def window_start(self, window) -> str:
+        return datetime.fromtimestamp(window * self.window_minutes * 60).isoformat()
+
+    def add(self, sentiment, category=None, timestamp=None) -> list:
+        """Count one interaction; returns alerts raised by windows it closed."""
+        window = self.window_of(timestamp or datetime.now())
+        negative = str(sentiment).upper() == "NEGATIVE"
+        keys = [ALL]
+        if self.per_category and category:
+            keys.append(category)
+        raised = []
+        for key in keys:
+            state = self.series.setdefault(key, SeriesState(window))
+            if window > state.window:
+                raised += self._advance(key, state, window)
+            state.total += 1
+            state.negative += negative
+        return raised
+
+    def tick(self, timestamp=None) -> list:
+        """Close windows that have ended without new interactions (e.g. before reporting)."""
+        window = self.window_of(timestamp or datetime.now())
+        raised = []
+        for key, state in self.series.items():
+            if window > state.window:
+                raised += self._advance(key, state, window)
+        return raised
+
+    def _advance(self, key, state, window) -> list:
+        """Close the current window and any empty ones up to ``window``."""
+        raised = []
+        gap = window - state.window
+        if gap > self.max_gap:  # long outage: don't replay thousands of empty windows
+            state.window = window - self.max_gap
+        while state.window < window:
+            alert = self._close(key, state)
+            if alert:
+                raised.append(alert)
+            state.window += 1
+            state.total = state.negative = 0
+        return raised
+
+    def _close(self, key, state):
+        x = state.negative
+        sd = max(math.sqrt(state.var), self.min_sd)
+        z = (x - state.mean) / sd
+        alert = None
+        if state.windows >= self.warmup:
+            state.cusum = min(max(0.0, state.cusum + z - self.k), 1.5 * self.h)
+            in_alarm = state.cusum > self.h and (state.alarm or x >= self.min_negative)
+            if in_alarm and not state.alarm:
+                state.alarm_since = state.window
+                alert = {
+                    "key": key,
+                    "window_start": self.window_start(state.window),
+                    "negative": x,
+                    "total": state.total,
+                    "baseline": round(state.mean, 2),
+                    "z": round(z, 2),
+                }
+                self.alerts.append(alert)
+            elif not in_alarm:
+                state.alarm_since = None
+            state.alarm = in_alarm
+        if not state.alarm:
+            delta = x - state.mean
+            state.mean += self.alpha * delta
+            state.var = (1 - self.alpha) * (state.var + self.alpha * delta * delta)
+        state.windows += 1
+        return alert
+
+    # ----------------------------------------------
+    # Reporting
+    # ----------------------------------------------
+    def status(self) -> dict:
+        """Current alarm state per series, including the still-open window."""
+        series = {}
+        for key, state in self.series.items():
+            sd = max(math.sqrt(state.var), self.min_sd)
+            series[key] = {
+                "alarm": state.alarm,
+                "alarm_since": self.window_start(state.alarm_since) if state.alarm_since is not None else None,
+                "warming_up": state.windows < self.warmup,
+                "baseline_negative": round(state.mean, 2),
+                "cusum": round(state.cusum, 2),
+                "current_window": {
+                    "start": self.window_start(state.window),
+                    "negative": state.negative,
+                    "total": state.total,
+                    "z": round((state.negative - state.mean) / sd, 2),
+                },
+            }
+        return {
+            "window_minutes": self.window_minutes,
+            "active": sorted(key for key, s in self.series.items() if s.alarm),
+            "series": series,
+            "recent_alerts": list(self.alerts),
+        }
+
+    # ----------------------------------------------
+    # Persistence
+    # ----------------------------------------------
+    def params(self) -> dict:
+        """Constructor arguments that shape the detector's state."""
+        return {
+            "window_minutes": self.window_minutes, "alpha": self.alpha, "k": self.k, "h": self.h,
+            "warmup": self.warmup, "min_negative": self.min_negative, "min_sd": self.min_sd,
+            "per_category": self.per_category, "max_gap": self.max_gap,
+        }
+
+    def save(self, path=STATE_FILE):
+        path = Path(path)
+        data = {
+            "params": self.params(),
+            "series": {key: state.to_dict() for key, state in self.series.items()},
+            "alerts": list(self.alerts),
+        }
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path=STATE_FILE, **defaults):
+        """Restore a saved detector, or return a fresh one if there is none."""
+        if not os.path.exists(path):
+            return cls(**defaults)
+        with open(path, "r") as f:
+            data = json.load(f)
+        detector = cls(**data["params"])
+        detector.series = {key: SeriesState.from_dict(s) for key, s in data["series"].items()}
+        detector.alerts.extend(data["alerts"])
+        return detector
+
+    @classmethod
+    def replay(cls, records, **params):
+        """Detector fed with stored interactions in order; returns it and every alert raised."""
+        detector = cls(**params)
+        raised = []
+        for record in records:
+            try:
+                window_raised = detector.add(record.get("sentiment"), record.get("category"), record["timestamp"])
+            except (KeyError, TypeError, ValueError):
+                continue  # no usable timestamp
+            raised += window_raised
+        return detector, raised
@@ -0,0 +1,48 @@
+import re
+import zlib
+
+import numpy as np
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+N_FEATURES = 2 ** 14
+STOPWORDS = frozenset(
+    "a about an and are as at be can do for from get how i in is it know me my need of on or "
+    "our please tell the there this to us we what when where which who why will with you your".split()
+)
+
+
+def tokenize(text: str) -> list:
+    """Lowercase word tokens without common stopwords."""
+    return [t for t in TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+
+
+def ngrams(text: str) -> list:
+    """Word unigrams and bigrams of the text."""
+    tokens = tokenize(text)
+    return tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+
+def feature_index(term: str, n_features: int = N_FEATURES) -> int:
+    """Stable hash bucket of a term (crc32, unlike the per-process ``hash``)."""
+    return zlib.crc32(term.encode("utf-8")) % n_features
+
+
+def hash_counts(texts: list, n_features: int = N_FEATURES) -> np.ndarray:
+    """Raw hashed n-gram counts, one row per text."""
+    matrix = np.zeros((len(texts), n_features), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for term in ngrams(text):
+            matrix[row, feature_index(term, n_features)] += 1.0
+    return matrix
+
+
+def l2_normalize(matrix: np.ndarray) -> np.ndarray:
+    """Scale each row to unit length in place; all-zero rows stay zero."""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    np.divide(matrix, norms, out=matrix, where=norms > 0)
+    return matrix
+
+
+def hash_vectorize(texts: list, n_features: int = N_FEATURES) -> np.ndarray:
+    """L2-normalised hashed n-gram counts, one row per text."""
+    return l2_normalize(hash_counts(texts, n_features))
@@ -0,0 +1,162 @@
+import json
+import os
+import tempfile
+from collections import Counter
+from datetime import date, timedelta
+from pathlib import Path
+
+import numpy as np
+
+from analysis.text_features import N_FEATURES, hash_counts, l2_normalize, ngrams
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+STATE_FILE = DATA_DIR / "topics_state.npz"
+
+
+class StreamingTopicModel:
+    """Mini-batch spherical k-means over hashed TF-IDF vectors.
+
+    Memory is fixed by construction, however long the history grows:
+    k centroids and one document-frequency array over the hashed feature
+    space, at most ``max_terms`` label candidates per topic, and daily
+    volume/negative counters for the last ``history_days`` days.
+    """
+
+    def __init__(self, n_topics=12, n_features=N_FEATURES, max_terms=200, history_days=90, seed_similarity=0.3):
+        self.n_topics = n_topics
+        self.seed_similarity = seed_similarity
+        self.n_features = n_features
+        self.max_terms = max_terms
+        self.history_days = history_days
+
+        self.centroids = np.zeros((n_topics, n_features), dtype=np.float32)
+        self.sizes = np.zeros(n_topics, dtype=np.int64)
+        self.doc_freq = np.zeros(n_features, dtype=np.float32)
+        self.n_docs = 0
+        self.terms = [Counter() for _ in range(n_topics)]
+        self.daily = [{} for _ in range(n_topics)]  # topic -> {iso date: [volume, negative]}
+
+    # ----------------------------------------------
+    # Updates
+    # ----------------------------------------------
+    def _tfidf(self, counts: np.ndarray) -> np.ndarray:
+        idf = np.log((1.0 + self.n_docs) / (1.0 + self.doc_freq)) + 1.0
+        return l2_normalize(counts * idf)
+
+    def update(self, texts: list, sentiments: list, day: str = None) -> list:
+        """Fold a mini-batch into the model and return each text's topic (-1 if empty)."""
+        day = day or date.today().isoformat()
+        counts = hash_counts(texts, self.n_features)
+        self.doc_freq += (counts > 0).sum(axis=0)
+        self.n_docs += len(texts)
+        vectors = self._tfidf(counts)
+
+        assigned = []
+        for text, sentiment, vector in zip(texts, sentiments, vectors):
+            if not vector.any():
+                assigned.append(-1)
+                continue
+            topic = self._assign(vector)
+            self.sizes[topic] += 1
+            rate = 1.0 / self.sizes[topic]
+            centroid = (1.0 - rate) * self.centroids[topic] + rate * vector
+            self.centroids[topic] = centroid / max(np.linalg.norm(centroid), 1e-12)
+
+            self._count_terms(topic, text)
+            bucket = self.daily[topic].setdefault(day, [0, 0])
+            bucket[0] += 1
+            bucket[1] += int(str(sentiment).upper() == "NEGATIVE")
+            assigned.append(topic)
+
+        self._prune_days(day)
+        return assigned
+
+    def _assign(self, vector) -> int:
+        """Nearest topic, or an unused one if the document is unlike all seeded topics."""
+        used = self.sizes > 0
+        if not used.any():
+            return 0
+        similarity = self.centroids @ vector
+        similarity[~used] = -np.inf
+        best = int(similarity.argmax())
+        if not used.all() and similarity[best] < self.seed_similarity:
+            return int(np.flatnonzero(~used)[0])
+        return best
+
+    def _count_terms(self, topic, text):
+        terms = self.terms[topic]
+        terms.update(set(ngrams(text)))
+        if len(terms) > self.max_terms:
+            self.terms[topic] = Counter(dict(terms.most_common(self.max_terms // 2)))
+
+    def _prune_days(self, today):
+        cutoff = (date.fromisoformat(today) - timedelta(days=self.history_days)).isoformat()
+        for series in self.daily:
+            for day in [d for d in series if d < cutoff]:
+                del series[day]
+
+    # ----------------------------------------------
+    # Reporting
+    # ----------------------------------------------
+    def label(self, topic, n_terms=4) -> list:
+        return [term for term, _ in self.terms[topic].most_common(n_terms)]
+
+    def summary(self) -> list:
+        """Topics by volume, with top terms, negative share and daily series."""
+        topics = []
+        for topic in np.argsort(-self.sizes):
+            if not self.sizes[topic]:
+                continue
+            series = sorted(self.daily[topic].items())
+            volume = sum(v for _, (v, _) in series)
+            negative = sum(n for _, (_, n) in series)
+            topics.append({
+                "topic": int(topic),
+                "terms": self.label(topic),
+                "size": int(self.sizes[topic]),
+                "volume": volume,
+                "negative_share": round(negative / volume, 3) if volume else 0.0,
+                "series": [{"date": d, "volume": v, "negative": n} for d, (v, n) in series],
+            })
+        return topics
+
+    # ----------------------------------------------
+    # Persistence
+    # ----------------------------------------------
+    def save(self, path=STATE_FILE):
+        path = Path(path)
+        meta = {
+            "n_docs": self.n_docs,
+            "max_terms": self.max_terms,
+            "history_days": self.history_days,
+            "seed_similarity": self.seed_similarity,
+            "terms": [dict(t) for t in self.terms],
+            "daily": self.daily,
+        }
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=path.stem, suffix=".npz")
+        with os.fdopen(fd, "wb") as f:
+            np.savez_compressed(
+                f,
+                centroids=self.centroids,
+                sizes=self.sizes,
+                doc_freq=self.doc_freq,
+                meta=np.array(json.dumps(meta)),
+            )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path=STATE_FILE, **defaults):
+        """Restore a saved model, or return a fresh one if there is none."""
+        if not os.path.exists(path):
+            return cls(**defaults)
+        with np.load(path) as state:
+            meta = json.loads(str(state["meta"]))
+            n_topics, n_features = state["centroids"].shape
+            model = cls(n_topics, n_features, meta["max_terms"], meta["history_days"], meta["seed_similarity"])
+            model.centroids = state["centroids"]
+            model.sizes = state["sizes"]
+            model.doc_freq = state["doc_freq"]
+        model.n_docs = meta["n_docs"]
+        model.terms = [Counter(t) for t in meta["terms"]]
+        model.daily = meta["daily"]
+        return model
@@ -1,17 +1,42 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify, stream_with_context
 from transformers import AutoModelForCausalLM, AutoTokenizer
 import torch
 import os
 from dotenv import load_dotenv
-from analysis.sentiment import analyze_sentiment
+from analysis.sentiment import analyze_sentiment, analyze_sentiment_batch
+from analysis.categories import (
+    CategoryClassifier, add_category_counts, count_categories, load_category_counts, save_category_counts
+)
+from analysis.topics import StreamingTopicModel
+from analysis.spikes import STATE_FILE as SPIKE_STATE_FILE, SpikeDetector
+from analysis.dataload import TEXT_COLUMNS, search_text
+from services.admission import AdmissionController, AdmissionRejected
+from services.breaker import CircuitBreaker, CircuitOpen
+from services.cache import ResponseCache
+from services.fallback import AnswerIndex
+from services.faq import FaqIndex, is_direct_answer
+from services.router import BackendStats, LatencyRouter, parse_cost_weights
+from services.registry import DEFAULT_MODEL, DETAIL_LEVEL_TOKENS, ModelDoesNotFit, ModelRegistry
+from services.store import InteractionStore
+from services import tracing
+from services.tracing import REQUEST_ID_HEADER, SAMPLED_HEADER, FileExporter, Tracer
+import csv
+import io
 import json
+import logging
 import requests
+import atexit
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 # ==================================================
 # ⚡️ Load Environment
 # ==================================================
 load_dotenv()
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"), format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
 HF_TOKEN = os.getenv("HF_TOKEN")
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 device = "cuda" if torch.cuda.is_available() else "cpu"
@@ -19,21 +44,210 @@ device = "cuda" if torch.cuda.is_available() else "cpu"
 # ==================================================
 # ⚡️ Model Configuration
 # ==================================================
-IBM_MODEL_NAME = "ibm-granite/granite-3.3-2b-instruct"
+# LOCAL_MODEL: "auto" loads Granite only on GPU, "on" also loads it on CPU,
+# "off" never loads it (Groq only).
+LOCAL_MODEL = os.getenv("LOCAL_MODEL", "auto").lower()
+local_model_enabled = LOCAL_MODEL == "on" or (LOCAL_MODEL == "auto" and device == "cuda")
 
-if device == "cuda":
-    ibm_tokenizer = AutoTokenizer.from_pretrained(IBM_MODEL_NAME, use_auth_token=HF_TOKEN)
-    ibm_model = AutoModelForCausalLM.from_pretrained(
-        IBM_MODEL_NAME,
-        torch_dtype=torch.float16,
+# Models are loaded on demand and kept resident under MODEL_MEMORY_BUDGET_GB;
+# the active one can be swapped at runtime through /settings.
+model_registry = ModelRegistry(
+    device,
+    memory_budget=float(os.getenv("MODEL_MEMORY_BUDGET_GB", "12")) * 1024 ** 3,
+    token=HF_TOKEN,
+)
+if local_model_enabled:
+    model_registry.set_active(os.getenv("IBM_MODEL", DEFAULT_MODEL))
+
+# Runtime-adjustable generation settings (System Settings page).
+generation_settings = {"detail_level": 3}
+
+def max_new_tokens():
+    return DETAIL_LEVEL_TOKENS[generation_settings["detail_level"]]
+
+# Optional speculative (assisted) decoding: a small draft model proposes
+# SPECULATIVE_NUM_TOKENS tokens and Granite verifies them in one forward
+# pass. Enabled per deployment by setting IBM_DRAFT_MODEL_NAME, e.g. to
+# "ibm-granite/granite-3.1-1b-a400m-instruct". Benchmark a candidate draft
+# with scripts/bench_speculative.py before turning it on.
+IBM_DRAFT_MODEL_NAME = os.getenv("IBM_DRAFT_MODEL_NAME")
+SPECULATIVE_NUM_TOKENS = int(os.getenv("SPECULATIVE_NUM_TOKENS", "5"))
+
+ibm_draft_model, ibm_draft_tokenizer = None, None
+ibm_draft_shares_vocab = {}  # active model name -> whether the draft can skip re-tokenizing
+if local_model_enabled and IBM_DRAFT_MODEL_NAME:
+    ibm_draft_tokenizer = AutoTokenizer.from_pretrained(IBM_DRAFT_MODEL_NAME, use_auth_token=HF_TOKEN)
+    ibm_draft_model = AutoModelForCausalLM.from_pretrained(
+        IBM_DRAFT_MODEL_NAME,
+        torch_dtype=torch.float16 if device == "cuda" else torch.float32,
         device_map="auto",
         use_auth_token=HF_TOKEN
     )
-else:
-    ibm_tokenizer, ibm_model = None, None
+    ibm_draft_model.generation_config.num_assistant_tokens = SPECULATIVE_NUM_TOKENS
+
+# The local model serves one generation at a time; concurrent requests queue
+# here and the router sees that queue as in-flight depth on "local".
+ibm_model_lock = threading.Lock()
+
+# ==================================================
+# ⚡️ Admission Control
+# ==================================================
+# Only inference requests go through the queue; /dashboard, /health and
+# /metrics are answered directly so they stay responsive under load.
+admission = AdmissionController(
+    max_concurrency=int(os.getenv("CHAT_MAX_CONCURRENCY", "4")),
+    max_queue=int(os.getenv("CHAT_MAX_QUEUE", "16")),
+    max_wait=float(os.getenv("CHAT_MAX_WAIT_SECONDS", "20")),
+)
+CHAT_DEADLINE_SECONDS = float(os.getenv("CHAT_DEADLINE_SECONDS", "30"))
+BATCH_SIZE = int(os.getenv("BATCH_SIZE", "8"))
+BATCH_PRIORITY = 1  # interactive /chat requests (priority 0) go first
+FEED_POLL_SECONDS = float(os.getenv("FEED_POLL_SECONDS", "2"))
+
+# ==================================================
+# ⚡️ Backend Routing
+# ==================================================
+# ROUTER_COST_WEIGHTS adds a fixed penalty (in seconds) per backend, e.g.
+# "groq=0.5" to prefer the local model unless Groq is clearly faster. A
+# backend left unused for ROUTER_PROBE_SECONDS gets one request as a probe so
+# its latency estimate stays current (0 disables probing).
+cost_weights = parse_cost_weights(os.getenv("ROUTER_COST_WEIGHTS", "local=0,groq=0.2"))
+router = LatencyRouter(
+    [
+        BackendStats("local", cost_weights.get("local", 0.0), initial_latency=5.0 if device == "cuda" else 30.0),
+        BackendStats("groq", cost_weights.get("groq", 0.0), initial_latency=2.0),
+    ],
+    hysteresis=float(os.getenv("ROUTER_HYSTERESIS", "0.25")),
+    probe_interval=float(os.getenv("ROUTER_PROBE_SECONDS", "60")),
+)
+response_cache = ResponseCache(
+    max_entries=int(os.getenv("RESPONSE_CACHE_SIZE", "512")),
+    ttl=float(os.getenv("RESPONSE_CACHE_TTL", "3600")),
+)
+
+interaction_store = InteractionStore()
+category_classifier = CategoryClassifier()
+
+# The category counters are maintained on write; seed them from the stored
+# history when they are missing or out of step with it (e.g. first start).
+with interaction_store.locked():
+    history = interaction_store.load()
+    if sum(load_category_counts().values()) != len(history):
+        logger.info(f"Seeding category counts from {len(history)} stored interactions")
+        save_category_counts(count_categories(history, category_classifier))
+
+# ==================================================
+# ⚡️ Groq Circuit Breaker
+# ==================================================
+# When Groq errors or slows down past the thresholds below, calls fail fast
+# instead of each waiting out the request timeout. While the breaker is
+# open, queries get the stored answer to the most similar past query.
+groq_breaker = CircuitBreaker(
+    "groq",
+    failure_threshold=float(os.getenv("GROQ_BREAKER_FAILURE_RATE", "0.5")),
+    window_size=int(os.getenv("GROQ_BREAKER_WINDOW", "20")),
+    min_calls=int(os.getenv("GROQ_BREAKER_MIN_CALLS", "5")),
+    slow_call_seconds=float(os.getenv("GROQ_BREAKER_SLOW_SECONDS", "5")),
+    open_seconds=float(os.getenv("GROQ_BREAKER_OPEN_SECONDS", "30")),
+)
+GROQ_ERROR_REPLY = "⚠️ Groq API error: Unable to connect or fetch response. Please try again later."
+DEGRADED_NOTE = "ℹ️ Our assistant is temporarily limited. Here is our answer to a similar earlier question"
+fallback_answers = AnswerIndex(
+    min_similarity=float(os.getenv("FALLBACK_MIN_SIMILARITY", "0.5")),
+    skip_prefixes=("⚠️", DEGRADED_NOTE),
+)
+fallback_answers.add(interaction_store.load(), interaction_store.load_ratings())
+
+# ==================================================
+# ⚡️ FAQ Fast Path
+# ==================================================
+# Curated answers in data/faq/*.json are searched before any model is
+# called. A confident match on at least FAQ_MIN_MATCHED_TERMS distinct
+# query terms is returned as-is; weaker matches are passed to the model as
+# grounding context.
+faq_index = FaqIndex.from_dir()
+FAQ_ANSWER_THRESHOLD = float(os.getenv("FAQ_ANSWER_THRESHOLD", "0.45"))
+FAQ_CONTEXT_THRESHOLD = float(os.getenv("FAQ_CONTEXT_THRESHOLD", "0.25"))
+FAQ_MIN_MATCHED_TERMS = int(os.getenv("FAQ_MIN_MATCHED_TERMS", "2"))
+FAQ_CONTEXT_PASSAGES = int(os.getenv("FAQ_CONTEXT_PASSAGES", "3"))
+
+# Topic clusters are updated on every save and checkpointed to disk every
+# TOPIC_SAVE_EVERY interactions (and at shutdown).
+topic_model = StreamingTopicModel.load(n_topics=int(os.getenv("TOPIC_COUNT", "12")))
+TOPIC_SAVE_EVERY = int(os.getenv("TOPIC_SAVE_EVERY", "25"))
+topic_updates_since_save = 0
+atexit.register(lambda: topic_model.save())
+
+# Negative-sentiment spike detection, updated on every save and checkpointed
+# with the topic model. A fresh deployment learns its baseline by replaying
+# the stored history once, and so does one whose saved state was built with
+# other settings; scripts/backtest_spikes.py tunes the thresholds.
+spike_params = SpikeDetector(
+    window_minutes=int(os.getenv("SPIKE_WINDOW_MINUTES", "60")),
+    alpha=float(os.getenv("SPIKE_ALPHA", "0.1")),
+    k=float(os.getenv("SPIKE_SLACK", "0.5")),
+    h=float(os.getenv("SPIKE_THRESHOLD", "4")),
+    warmup=int(os.getenv("SPIKE_WARMUP", "24")),
+    min_negative=int(os.getenv("SPIKE_MIN_NEGATIVE", "3")),
+    min_sd=float(os.getenv("SPIKE_MIN_SD", "1")),
+    per_category=os.getenv("SPIKE_PER_CATEGORY", "1") == "1",
+    max_gap=int(os.getenv("SPIKE_MAX_GAP", "168")),
+).params()
+spike_detector = SpikeDetector.load(SPIKE_STATE_FILE) if SPIKE_STATE_FILE.exists() else None
+if spike_detector is None or spike_detector.params() != spike_params:
+    if spike_detector is not None:
+        logger.warning(
+            f"Spike detector settings changed ({spike_detector.params()} -> {spike_params}); "
+            "rebuilding its state from the stored history"
+        )
+    spike_detector, _ = SpikeDetector.replay(interaction_store.load(), **spike_params)
+atexit.register(lambda: spike_detector.save())
 
 app = Flask(__name__)
 
+# ==================================================
+# ⚡️ Request Tracing
+# ==================================================
+# Every request gets an id (the client's X-Request-ID, or a new one) that
+# is echoed back in the response. TRACE_SAMPLE_RATE of requests, chosen
+# when they start, have their pipeline stages recorded as spans and written
+# as one JSON line per request to data/traces.jsonl.
+tracer = Tracer(
+    sample_rate=float(os.getenv("TRACE_SAMPLE_RATE", "0.05")),
+    exporter=FileExporter(max_bytes=int(os.getenv("TRACE_FILE_MAX_MB", "10")) * 2 ** 20),
+)
+UNTRACED_PATHS = {"/health", "/metrics", "/interactions/stream"}
+
+@app.before_request
+def start_trace():
+    g.request_id = request.headers.get(REQUEST_ID_HEADER) or tracing.new_request_id()
+    sampled = False if request.path in UNTRACED_PATHS else tracing.parse_sampled(request.headers.get(SAMPLED_HEADER))
+    g.trace_token = tracer.start(f"{request.method} {request.path}", g.request_id, sampled)
+
+@app.after_request
+def add_request_id(response):
+    response.headers[REQUEST_ID_HEADER] = g.request_id
+    tracing.annotate(status_code=response.status_code)
+    return response
+
+@app.teardown_request
+def finish_trace(error):
+    if "trace_token" not in g:
+        return
+    if g.pop("trace_streamed", False):
+        tracer.detach(g.pop("trace_token"))  # finished by the stream, see traced_stream
+    else:
+        tracer.finish(g.pop("trace_token"), error)
+
+def traced_stream(body):
+    """Streamed response body that keeps the request's trace open until it is sent.
+
+    Teardown runs before a streamed body is iterated, so the trace would
+    otherwise be exported with none of the body's spans.
+    """
+    g.trace_streamed = True
+    return stream_with_context(tracing.stream(tracing.current(), body))
+
 # ==================================================
 # ⚡️ Routes
 # ==================================================
@@ -41,6 +255,70 @@ app = Flask(__name__)
 def index():
     return jsonify({"message": "Citizen AI API is running"})
 
+@app.route("/health")
+def health():
+    return jsonify({"status": "ok", "device": device})
+
+@app.route("/metrics")
+def metrics():
+    return jsonify({
+        "models": model_registry.status(),
+        "admission": admission.metrics(),
+        "router": router.snapshot(),
+        "cache": response_cache.stats(),
+        "groq_breaker": groq_breaker.snapshot(),
+        "fallback": fallback_answers.stats(),
+        "faq": faq_index.stats(),
+    })
+
+@app.route("/settings", methods=["GET", "POST"])
+def settings():
+    """Read or update the active model and generation settings.
+
+    Switching models loads the new one in the background before it becomes
+    active, so the API keeps answering with the previous model during the
+    swap; ``loading_model`` names the model being loaded and ``load_error``
+    reports why the last swap failed, if it did. A model that cannot fit in
+    MODEL_MEMORY_BUDGET_GB next to the active one is refused up front. The
+    whole request is validated first, so a rejected one changes nothing.
+    """
+    if request.method == "POST":
+        data = request.get_json(silent=True) or {}
+        level = generation_settings["detail_level"]
+        if "detail_level" in data:
+            try:
+                level = int(data["detail_level"])
+            except (TypeError, ValueError):
+                level = None
+            if level not in DETAIL_LEVEL_TOKENS:
+                return jsonify({"error": "detail_level must be between 1 and 5"}), 400
+        model = data.get("model")
+        if model == model_registry.active_name:
+            model = None
+        if model:
+            if model not in model_registry.catalog:
+                return jsonify({"error": f"Unknown model: {model}"}), 400
+            if not local_model_enabled:
+                return jsonify({"error": "Local models are disabled on this server (LOCAL_MODEL)"}), 409
+            try:
+                model_registry.check_fits(model)
+            except ModelDoesNotFit as e:
+                return jsonify({"error": str(e)}), 409
+
+        generation_settings["detail_level"] = level
+        if model:
+            model_registry.set_active_async(model)
+        response_cache.clear()
+    return jsonify({
+        **generation_settings,
+        "max_new_tokens": max_new_tokens(),
+        "model": model_registry.active_name,
+        "loading_model": model_registry.loading,
+        "load_error": model_registry.load_error,
+        "models": list(model_registry.catalog),
+        "local_models_enabled": local_model_enabled,
+    })
+
 @app.route("/chat", methods=["POST"])
 def chat():
     try:
@@ -49,49 +327,394 @@ def chat():
         if not user_query:
             return jsonify({"error": "Query is required"}), 400
 
-        if device == "cuda":
-            reply = call_ibm_model(user_query)
-        else:
-            reply = call_groq_model(user_query)
+        try:
+            timeout = min(float(data.get("timeout", CHAT_DEADLINE_SECONDS)), CHAT_DEADLINE_SECONDS)
+        except (TypeError, ValueError):
+            timeout = -1
+        if not timeout > 0:  # also rejects NaN
+            return jsonify({"error": "timeout must be a positive number of seconds"}), 400
+        # Cached and FAQ answers skip the queue: they take microseconds and
+        # would otherwise skew the admission service-time estimate.
+        reply, passages = lookup_reply(user_query)
+        if reply is None:
+            with admission.admit(deadline=time.monotonic() + timeout) as queue_wait:
+                tracing.annotate(queue_wait_ms=round(queue_wait * 1000, 3))
+                with tracing.span("generate"):
+                    reply = generate_reply(user_query, passages)
 
-        sentiment = analyze_sentiment(user_query)
-        save_interaction(user_query, reply, sentiment)
+        with tracing.span("sentiment"):
+            sentiment = analyze_sentiment(user_query)
+        entry = save_interaction(user_query, reply, sentiment)
 
-        return jsonify({"reply": reply, "sentiment": sentiment})
+        return jsonify({"id": entry["id"], "reply": reply, "sentiment": sentiment, "category": entry["category"]})
+    except AdmissionRejected as e:
+        tracing.annotate(rejected=e.reason)
+        response = jsonify({"error": "Server is busy, please retry later", "reason": e.reason})
+        response.headers["Retry-After"] = str(e.retry_after)
+        return response, 429
     except Exception as e:
-        print(f"[Server Error] {e}")
-        return jsonify({"error": "Internal Server Error"}), 500
+        logger.exception(f"Unhandled error in /chat (request {g.request_id})")
+        tracing.record_error(e)
+        return jsonify({"error": "Internal Server Error", "request_id": g.request_id}), 500
+
+@app.route("/chat/batch", methods=["POST"])
+def chat_batch():
+    """Answer many queries, streaming NDJSON results and progress lines.
+
+    Accepts a JSON array (of strings or {"id", "query"} objects), a JSON
+    object with a "queries" array, or a CSV body with a "query" column and
+    an optional "id" column. Every result line carries the item id, so a
+    client can resume after a failure by resubmitting only missing ids.
+    """
+    try:
+        items = parse_batch_items(request)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if not items:
+        return jsonify({"error": "At least one query is required"}), 400
+
+    def generate():
+        done = 0
+        for start in range(0, len(items), BATCH_SIZE):
+            chunk = items[start:start + BATCH_SIZE]
+            queries = [item["query"] for item in chunk]
+            lookups = [lookup_reply(q) for q in queries]
+            replies = [reply for reply, _ in lookups]
+            pending = [i for i, reply in enumerate(replies) if reply is None]
+            if pending:  # only items that need a model call are queued
+                try:
+                    with admission.admit(priority=BATCH_PRIORITY), tracing.span("generate", items=len(pending)):
+                        generated = generate_replies([queries[i] for i in pending], [lookups[i][1] for i in pending])
+                except AdmissionRejected as e:
+                    yield json.dumps({"error": "Server is busy", "reason": e.reason,
+                                      "retry_after": e.retry_after, "done": done, "total": len(items)}) + "\n"
+                    return
+                for i, reply in zip(pending, generated):
+                    replies[i] = reply
+            with tracing.span("sentiment", items=len(queries)):
+                sentiments = analyze_sentiment_batch(queries)
+            entries = save_interactions(queries, replies, sentiments)
+            for item, entry in zip(chunk, entries):
+                yield json.dumps({**entry, "id": item["id"], "interaction_id": entry["id"]}) + "\n"
+            done += len(chunk)
+            yield json.dumps({"progress": {"done": done, "total": len(items)}}) + "\n"
+
+    return Response(traced_stream(generate()), mimetype="application/x-ndjson")
+
+def parse_batch_items(req):
+    """Normalise a batch request body into a list of {"id", "query"} dicts."""
+    if req.mimetype == "text/csv":
+        body = req.get_data(as_text=True).removeprefix("\ufeff")  # BOM from Excel's "CSV UTF-8"
+        rows = csv.DictReader(io.StringIO(body))
+        if not rows.fieldnames or "query" not in rows.fieldnames:
+            raise ValueError("CSV input needs a 'query' column")
+        raw = list(rows)
+    else:
+        payload = req.get_json(silent=True)
+        raw = payload.get("queries") if isinstance(payload, dict) else payload
+        if not isinstance(raw, list):
+            raise ValueError("Expected a JSON array of queries")
+
+    items = []
+    for index, row in enumerate(raw):
+        if isinstance(row, str):
+            row = {"query": row}
+        if not isinstance(row, dict):
+            raise ValueError(f"Item {index} is not a query")
+        query = str(row.get("query") or "").strip()
+        if query:
+            items.append({"id": str(row.get("id") or index), "query": query})
+    return items
 
 @app.route("/dashboard", methods=["GET"])
 def dashboard():
     """Return all feedback entries as JSON for Streamlit."""
-    data_file = "data/feedback.json"
-    feedback = []
-    if os.path.exists(data_file) and os.path.getsize(data_file) > 0:
-        with open(data_file, "r") as f:
-            feedback = json.load(f)
-    return jsonify(feedback)
+    return jsonify(interaction_store.load_with_ratings())
+
+@app.route("/interactions", methods=["GET"])
+def interactions():
+    """Change feed: interactions and ratings added after ``cursor``.
+
+    Clients start with no cursor (or "0-0"), keep the returned cursor and
+    pass it back on the next call to receive only what is new. ``fields``
+    (comma-separated, e.g. "id,timestamp,sentiment,category") limits each
+    interaction to those keys, so label-only clients never download text.
+    """
+    try:
+        since, ratings_offset = parse_cursor(request.args.get("cursor"))
+    except ValueError:
+        return jsonify({"error": "Invalid cursor"}), 400
+    return jsonify(read_feed(since, ratings_offset, parse_fields(request.args.get("fields"))))
+
+@app.route("/interactions/stream", methods=["GET"])
+def interactions_stream():
+    """Server-sent events version of /interactions, one event per change."""
+    try:
+        since, ratings_offset = parse_cursor(request.args.get("cursor"))
+    except ValueError:
+        return jsonify({"error": "Invalid cursor"}), 400
+    fields = parse_fields(request.args.get("fields"))
+
+    def events():
+        nonlocal since, ratings_offset
+        while True:
+            delta = read_feed(since, ratings_offset, fields)
+            if delta["interactions"] or delta["ratings"]:
+                yield f"id: {delta['cursor']}\ndata: {json.dumps(delta)}\n\n"
+                since, ratings_offset = parse_cursor(delta["cursor"])
+            else:
+                yield ": keep-alive\n\n"
+            time.sleep(FEED_POLL_SECONDS)
+
+    return Response(traced_stream(events()), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache"})
+
+@app.route("/interactions/text", methods=["GET"])
+def interactions_text():
+    """Query/reply text for the requested ``seq`` positions (comma-separated)."""
+    try:
+        seqs = [int(s) for s in request.args.get("seq", "").split(",") if s.strip()]
+    except ValueError:
+        return jsonify({"error": "seq must be a comma-separated list of integers"}), 400
+    records, _ = interaction_store.since(0)
+    items = [
+        {"seq": s, **{column: records[s].get(column) for column in TEXT_COLUMNS}}
+        for s in seqs if 0 <= s < len(records)
+    ]
+    return jsonify({"items": items})
+
+@app.route("/interactions/search", methods=["GET"])
+def interactions_search():
+    """``seq`` of interactions whose query or reply contains ``q``."""
+    query = request.args.get("q", "").strip()
+    if not query:
+        return jsonify({"error": "q is required"}), 400
+    records, _ = interaction_store.since(0)
+    return jsonify({"seq": search_text(records, query)})
+
+def parse_cursor(cursor):
+    if not cursor:
+        return 0, 0
+    since, _, ratings_offset = cursor.partition("-")
+    since, ratings_offset = int(since), int(ratings_offset or 0)
+    if since < 0 or ratings_offset < 0:
+        raise ValueError(cursor)
+    return since, ratings_offset
+
+def parse_fields(fields):
+    """``fields`` query parameter -> tuple of record keys, or None for whole records."""
+    names = tuple(name.strip() for name in (fields or "").split(",") if name.strip())
+    return names or None
+
+def read_feed(since, ratings_offset, fields=None):
+    records, since = interaction_store.since(since)
+    if fields is not None:
+        records = [{name: record[name] for name in fields if name in record} for record in records]
+    ratings, ratings_offset = interaction_store.ratings_since(ratings_offset)
+    return {
+        "interactions": records,
+        "ratings": ratings,
+        "cursor": f"{since}-{ratings_offset}",
+    }
+
+@app.route("/categories", methods=["GET"])
+def categories():
+    """Per-category interaction counts, maintained on write."""
+    return jsonify(load_category_counts())
+
+@app.route("/topics", methods=["GET"])
+def topics():
+    """Complaint topics with top terms, volume and negative share over time."""
+    with interaction_store.locked():
+        return jsonify(topic_model.summary())
+
+@app.route("/alerts", methods=["GET"])
+def alerts():
+    """Current negative-sentiment spike state, overall and per category."""
+    with interaction_store.locked():
+        spike_detector.tick()
+        return jsonify(spike_detector.status())
+
+@app.route("/feedback", methods=["POST"])
+def feedback():
+    """Record a thumbs-up/down rating for a previous /chat interaction."""
+    data = request.get_json(silent=True) or {}
+    interaction_id = str(data.get("interaction_id") or "").strip()
+    if not interaction_id:
+        return jsonify({"error": "interaction_id is required"}), 400
+    try:
+        record = interaction_store.add_rating(interaction_id, str(data.get("rating", "")).upper())
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except KeyError:
+        return jsonify({"error": f"Unknown interaction_id: {interaction_id}"}), 404
+    if record["rating"] == "NEGATIVE":
+        fallback_answers.discard(interaction_id)
+    return jsonify(record), 201
 
 # ==================================================
 # ⚡️ Model Call Definitions
 # ==================================================
-def call_ibm_model(user_query):
-    prompt = f"<|user|>\n{user_query}\n<|assistant|>\n"
+def groq_candidate():
+    """Whether Groq may be routed to: configured and its breaker not open."""
+    return bool(GROQ_API_KEY or not local_model_enabled) and groq_breaker.available()
+
+def consult_faq(user_query):
+    """``(answer, [])`` for a confident FAQ match, else ``(None, passages)``."""
+    with tracing.span("faq") as span:
+        hits = faq_index.search(user_query, k=FAQ_CONTEXT_PASSAGES)
+        span.set(confidence=hits[0]["confidence"] if hits else 0.0)
+    if hits and is_direct_answer(hits[0], FAQ_ANSWER_THRESHOLD, FAQ_MIN_MATCHED_TERMS):
+        faq_index.record(answered=True, grounded=False)
+        return hits[0]["answer"], []
+    passages = [hit for hit in hits if hit["confidence"] >= FAQ_CONTEXT_THRESHOLD]
+    faq_index.record(answered=False, grounded=bool(passages))
+    return None, passages
+
+def grounding_text(passages):
+    notes = "\n\n".join(f"Q: {p['question']}\nA: {p['answer']}" for p in passages)
+    return f"Use these official service notes where they are relevant:\n\n{notes}"
+
+def ibm_prompt(user_query, passages=()):
+    system = f"<|system|>\n{grounding_text(passages)}\n" if passages else ""
+    return f"{system}<|user|>\n{user_query}\n<|assistant|>\n"
+
+def lookup_reply(user_query):
+    """``(reply, [])`` from the response cache or a confident FAQ match, else
+    ``(None, passages)`` for the model to answer with."""
+    cached = response_cache.get(user_query)
+    if cached is not None:
+        tracing.annotate(backend="cache")
+        return cached, []
+    answer, passages = consult_faq(user_query)
+    if answer is not None:
+        tracing.annotate(backend="faq")
+    return answer, passages
+
+def generate_reply(user_query, passages=()):
+    """Answer from whichever model backend the router expects to be fastest."""
+    candidates = []
+    if local_model_enabled:
+        candidates.append("local")
+    if groq_candidate():
+        candidates.append("groq")
+    if not candidates:
+        tracing.annotate(backend="degraded")
+        return degraded_reply(user_query)
+
+    backend = router.choose(candidates)
+    tracing.annotate(backend=backend, grounded=bool(passages))
+    if backend == "local":
+        with router.track("local"):
+            reply = call_ibm_model(user_query, passages)
+        response_cache.put(user_query, reply)
+        return reply
+
+    reply = call_groq_model(user_query, passages)
+    if not reply.startswith(("⚠️", DEGRADED_NOTE)):
+        response_cache.put(user_query, reply)
+    return reply
+
+def generate_replies(queries, contexts):
+    """Batched counterpart of generate_reply for /chat/batch."""
+    candidates = (["local"] if local_model_enabled else []) + (["groq"] if groq_candidate() else [])
+    if not candidates:
+        return [degraded_reply(query) for query in queries]
+
+    backend = router.choose(candidates)
+    if backend == "local":
+        # Shown as in flight so /chat is not routed behind the batch, but the
+        # padded batch's duration says nothing about a single query's latency.
+        with router.track("local", measure=False):
+            replies = call_ibm_model_batch(queries, contexts)
+    else:
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            replies = list(pool.map(call_groq_model, queries, contexts))
+
+    for query, reply in zip(queries, replies):
+        if not reply.startswith(("⚠️", DEGRADED_NOTE)):
+            response_cache.put(query, reply)
+    return replies
+
+def call_ibm_model_batch(user_queries, contexts=None):
+    """Generate replies for several queries in one padded forward pass."""
+    contexts = contexts or [()] * len(user_queries)
+    prompts = [ibm_prompt(q, passages) for q, passages in zip(user_queries, contexts)]
+    _, ibm_tokenizer, ibm_model = model_registry.active()
+    ibm_tokenizer.padding_side = "left"
+    if ibm_tokenizer.pad_token is None:
+        ibm_tokenizer.pad_token = ibm_tokenizer.eos_token
+    inputs = ibm_tokenizer(prompts, return_tensors="pt", padding=True).to(ibm_model.device)
+
+    with ibm_model_lock, torch.no_grad():
+        outputs = ibm_model.generate(
+            **inputs,
+            max_new_tokens=max_new_tokens(),
+            temperature=0.5,
+            top_p=0.9,
+            do_sample=True,
+            pad_token_id=ibm_tokenizer.pad_token_id
+        )
+    new_tokens = outputs[:, inputs["input_ids"].shape[1]:]
+    return [reply.strip() for reply in ibm_tokenizer.batch_decode(new_tokens, skip_special_tokens=True)]
+
+def call_ibm_model(user_query, passages=()):
+    prompt = ibm_prompt(user_query, passages)
+    model_name, ibm_tokenizer, ibm_model = model_registry.active()
     inputs = ibm_tokenizer(prompt, return_tensors="pt").to(ibm_model.device)
 
-    with torch.no_grad():
+    with tracing.span("model.local", model=model_name) as span, ibm_model_lock, torch.no_grad():
         outputs = ibm_model.generate(
             **inputs,
-            max_new_tokens=100,
+            max_new_tokens=max_new_tokens(),
             temperature=0.5,
             top_p=0.9,
             do_sample=True,
-            pad_token_id=ibm_tokenizer.eos_token_id
+            pad_token_id=ibm_tokenizer.eos_token_id,
+            **assisted_generation_kwargs(model_name, ibm_tokenizer)
         )
+        span.set(new_tokens=outputs.shape[1] - inputs["input_ids"].shape[1])
     reply = ibm_tokenizer.decode(outputs[0], skip_special_tokens=True).split("<|assistant|>")[-1].strip()
     return reply
 
-def call_groq_model(user_query):
+def assisted_generation_kwargs(model_name, ibm_tokenizer):
+    """Extra generate() arguments enabling speculative decoding, if configured."""
+    if ibm_draft_model is None:
+        return {}
+    if model_name not in ibm_draft_shares_vocab:
+        ibm_draft_shares_vocab[model_name] = ibm_draft_tokenizer.get_vocab() == ibm_tokenizer.get_vocab()
+    kwargs = {"assistant_model": ibm_draft_model}
+    if not ibm_draft_shares_vocab[model_name]:
+        # Universal assisted decoding re-tokenizes draft output for the target.
+        kwargs.update(tokenizer=ibm_tokenizer, assistant_tokenizer=ibm_draft_tokenizer)
+    return kwargs
+
+def call_groq_model(user_query, passages=()):
+    """Groq reply through the circuit breaker, degrading instead of raising."""
+    try:
+        with tracing.span("model.groq"), groq_breaker.guard(), router.track("groq"):
+            return request_groq_completion(user_query, passages)
+    except CircuitOpen:
+        tracing.annotate(breaker="open")
+        return degraded_reply(user_query)
+    except requests.exceptions.RequestException as e:
+        logger.warning(f"Groq API error: {e}")
+        return degraded_reply(user_query)
+
+def degraded_reply(user_query):
+    """Stored answer to the most similar past query, or the Groq error notice.
+
+    The past query itself is never shown: it is another citizen's text and
+    may contain names, addresses or complaint details.
+    """
+    match = fallback_answers.best(user_query)
+    if match is None:
+        return GROQ_ERROR_REPLY
+    _, reply, _ = match
+    return f"{DEGRADED_NOTE}:\n\n{reply}"
+
+def request_groq_completion(user_query, passages=()):
+    """Call Groq and return the reply text; raises on connection or HTTP errors."""
     url = "https://api.groq.com/openai/v1/chat/completions"
     headers = {
         "Authorization": f"Bearer {GROQ_API_KEY}",
@@ -99,44 +722,56 @@ def call_groq_model(user_query):
     }
     payload = {
         "model": "llama3-8b-8192",
-        "messages": [{"role": "user", "content": user_query}],
-        "max_tokens": 100,
+        "messages": (
+            [{"role": "system", "content": grounding_text(passages)}] if passages else []
+        ) + [{"role": "user", "content": user_query}],
+        "max_tokens": max_new_tokens(),
         "temperature": 0.5,
         "top_p": 1.0
     }
 
-    try:
-        response = requests.post(url, headers=headers, json=payload, timeout=10)
-        response.raise_for_status()
-        return response.json()["choices"][0]["message"]["content"].strip()
-    except requests.exceptions.RequestException as e:
-        print(f"[Groq API Error]: {e}")
-        return "⚠️ Groq API error: Unable to connect or fetch response. Please try again later."
+    response = requests.post(url, headers=headers, json=payload, timeout=10)
+    response.raise_for_status()
+    return response.json()["choices"][0]["message"]["content"].strip()
 
 # ==================================================
 # ⚡️ Save Interaction
 # ==================================================
 def save_interaction(user_query, reply, sentiment):
     """Save interaction to feedback.json with timestamp."""
-    data_file = "data/feedback.json"
-    entry = {
-        "user_query": user_query,
-        "reply": reply,
-        "sentiment": sentiment,
-        "timestamp": datetime.now().isoformat()
-    }
-
-    if os.path.exists(data_file) and os.path.getsize(data_file) > 0:
-        with open(data_file, "r") as f:
-            data = json.load(f)
-    else:
-        data = []
-
-    data.append(entry)
+    return save_interactions([user_query], [reply], [sentiment])[0]
 
-    os.makedirs("data", exist_ok=True)
-    with open(data_file, "w") as f:
-        json.dump(data, f, indent=2)
+def save_interactions(user_queries, replies, sentiments):
+    """Append several interactions to feedback.json with a single write."""
+    timestamp = datetime.now().isoformat()
+    with tracing.span("classify"):
+        categories = category_classifier.classify_batch(user_queries)
+    entries = [
+        {
+            "user_query": user_query,
+            "reply": reply,
+            "sentiment": sentiment,
+            "category": category,
+            "timestamp": timestamp
+        }
+        for user_query, reply, sentiment, category in zip(user_queries, replies, sentiments, categories)
+    ]
+    global topic_updates_since_save
+    with tracing.span("save", items=len(entries)), interaction_store.locked():
+        interaction_store.append(entries)
+        fallback_answers.add(entries)
+        add_category_counts(categories)
+        with tracing.span("topics.update"):
+            topic_model.update(user_queries, sentiments, day=timestamp[:10])
+        for entry in entries:
+            for alert in spike_detector.add(entry["sentiment"], entry["category"], timestamp):
+                logger.warning(f"Negative sentiment spike: {alert}")
+        topic_updates_since_save += len(entries)
+        if topic_updates_since_save >= TOPIC_SAVE_EVERY:
+            topic_model.save()
+            spike_detector.save()
+            topic_updates_since_save = 0
+    return entries
 
 # ==================================================
 # ⚡️ Main
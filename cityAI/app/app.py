@@ -1,19 +1,29 @@
+import time
+_run_started = time.perf_counter()
+
 import streamlit as st
 import requests
 import json
-import pandas as pd
-import plotly.express as px
-from datetime import datetime
 from pathlib import Path
-import time
 import os
-import io
+import sys
 import logging
+from collections import deque
+
+# Shared backend modules (services/, analysis/) live next to app/
+ROOT_DIR = Path(__file__).resolve().parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from services.tracing import REQUEST_ID_HEADER, new_request_id
+
+# pandas, plotly and the analysis modules are imported inside the pages
+# that use them, so the AI Assistant page never loads the analytics stack.
 
 # ============================
-# 🔍 Setup Logging for Debugging
+# 🔍 Setup Logging
 # ============================
-logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"), format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 # ============================
@@ -29,248 +39,12 @@ st.set_page_config(
 # ============================
 # 🎨 Sleek Government-themed CSS Styling
 # ============================
-st.markdown("""
-<style>
-:root {
-    --primary: #1e40af;     /* Deep Blue */
-    --secondary: #3b82f6;   /* Bright Blue */
-    --accent: #d97706;      /* Warm Gold */
-    --success: #22c55e;     /* Green */
-    --warning: #eab308;     /* Yellow */
-    --danger: #ef4444;      /* Red */
-    --dark: #111827;        /* Dark Gray */
-    --light: #f9fafb;       /* Light Gray */
-    --card-bg: rgba(255, 255, 255, 0.99);
-}
-
-* {
-    transition: all 0.3s ease;
-    box-sizing: border-box;
-}
-
-body, .main {
-    background: linear-gradient(145deg, #f3f4f6, #e5e7eb);
-    font-family: 'Inter', 'Segoe UI', sans-serif;
-    color: #111827; /* Hardcoded --dark */
-}
-
-.stApp {
-    background: transparent;
-}
-
-/* Modern Header */
-h1 {
-    font-family: 'Inter', sans-serif;
-    font-size: 2.6rem !important;
-    font-weight: 600;
-    text-align: center;
-    margin: 2rem 0 1.3rem;
-    color: #1e40af; /* Hardcoded --primary */
-    letter-spacing: -0.3px;
-}
-
-h1::after {
-    content: '';
-    display: block;
-    width: 110px;
-    height: 4px;
-    background: linear-gradient(90deg, #1e40af, #d97706); /* Hardcoded --primary, --accent */
-    margin: 0.9rem auto 0;
-    border-radius: 2px;
-}
-
-/* Professional Sidebar */
-[data-testid="stSidebar"] {
-    background: linear-gradient(180deg, #1e40af, #1e3a8a) !important; /* Hardcoded --primary, darker shade */
-    color: white !important;
-    padding: 2rem 1.5rem;
-    border-right: none;
-    box-shadow: 3px 0 15px rgba(0, 0, 0, 0.25);
-}
-
-/* Navigation Buttons */
-.stRadio > div {
-    display: flex;
-    flex-direction: column;
-    gap: 0.9rem;
-}
-
-.stRadio > div > label {
-    background: rgba(255, 255, 255, 0.1) !important;
-    border: 1px solid rgba(255, 255, 255, 0.3) !important;
-    border-radius: 14px !important;
-    padding: 1.1rem 1.7rem !important;
-    color: white !important;
-    font-weight: 500 !important;
-    font-size: 1.05rem !important;
-    cursor: pointer;
-}
-
-.stRadio > div > label:hover {
-    background: rgba(255, 255, 255, 0.2) !important;
-    border-color: #d97706 !important; /* Hardcoded --accent */
-    transform: translateX(6px);
-    box-shadow: 0 4px 14px rgba(0, 0, 0, 0.25);
-}
-
-.stRadio > div > label[data-checked="true"] {
-    background: #d97706 !important; /* Hardcoded --accent */
-    border-color: #d97706 !important;
-    color: #111827 !important; /* Hardcoded --dark */
-    font-weight: 600 !important;
-}
-
-/* Input Fields */
-.stTextInput > div > div > input {
-    background: white !important;
-    border: 1px solid #d1d5db !important;
-    border-radius: 14px !important;
-    padding: 1.1rem !important;
-    font-size: 1.05rem !important;
-    color: #111827 !important; /* Hardcoded --dark */
-    box-shadow: 0 2px 6px rgba(0, 0, 0, 0.08) !important;
-}
-
-.stTextInput > div > div > input:focus {
-    border-color: #d97706 !important; /* Hardcoded --accent */
-    box-shadow: 0 0 0 3px rgba(217, 119, 6, 0.2) !important;
-    outline: none !important;
-}
-
-/* Cards */
-.card {
-    background: rgba(255, 255, 255, 0.99) !important; /* Hardcoded --card-bg */
-    border-radius: 18px !important;
-    padding: 2.2rem !important;
-    margin-bottom: 2.2rem !important;
-    border: 1px solid rgba(0, 0, 0, 0.05) !important;
-    box-shadow: 0 6px 20px rgba(0, 0, 0, 0.12) !important;
-}
-
-.card:hover {
-    transform: translateY(-6px) !important;
-    box-shadow: 0 8px 26px rgba(0, 0, 0, 0.18) !important;
-}
-
-/* Buttons */
-.stButton > button {
-    background: linear-gradient(135deg, #1e40af, #d97706) !important; /* Hardcoded --primary, --accent */
-    color: white !important;
-    border: none !important;
-    border-radius: 14px !important;
-    padding: 1rem 2.2rem !important;
-    font-size: 1.05rem !important;
-    font-weight: 600 !important;
-    box-shadow: 0 4px 14px rgba(0, 0, 0, 0.2) !important;
-}
-
-.stButton > button:hover {
-    transform: translateY(-3px) !important;
-    box-shadow: 0 6px 20px rgba(0, 0, 0, 0.25) !important;
-    background: linear-gradient(135deg, #d97706, #1e40af) !important; /* Hardcoded --accent, --primary */
-}
-
-/* Status Indicators */
-.status-indicator {
-    display: inline-flex;
-    align-items: center;
-    gap: 0.8rem;
-    padding: 0.7rem 1.3rem;
-    border-radius: 28px;
-    font-size: 0.95rem;
-    font-weight: 500;
-    background: rgba(217, 119, 6, 0.1); /* Hardcoded --accent with opacity */
-    color: #d97706; /* Hardcoded --accent */
-}
-
-.status-dot {
-    width: 14px;
-    height: 14px;
-    border-radius: 50%;
-    background: #d97706; /* Hardcoded --accent */
-    animation: pulse 1.4s infinite;
-}
-
-@keyframes pulse {
-    0% { transform: scale(1); opacity: 1; }
-    50% { transform: scale(1.5); opacity: 0.7; }
-    100% { transform: scale(1); opacity: 1; }
-}
-
-/* Badges */
-.badge {
-    display: inline-block;
-    padding: 0.5rem 1.1rem;
-    border-radius: 18px;
-    font-size: 0.95rem;
-    font-weight: 600;
-}
-
-.badge-positive {
-    background: rgba(34, 197, 94, 0.1);
-    color: #22c55e; /* Hardcoded --success */
-}
-
-.badge-negative {
-    background: rgba(239, 68, 68, 0.1);
-    color: #ef4444; /* Hardcoded --danger */
-}
-
-.badge-neutral {
-    background: rgba(234, 179, 8, 0.1);
-    color: #eab308; /* Hardcoded --warning */
-}
-
-/* Animations */
-@keyframes fadeIn {
-    from { opacity: 0; transform: translateY(14px); }
-    to { opacity: 1; transform: translateY(0); }
-}
-
-.fade-in {
-    animation: fadeIn 0.8s ease-out;
-}
-
-/* Alert Boxes */
-.stAlert {
-    border-radius: 14px !important;
-    padding: 1.3rem !important;
-    font-size: 0.95rem !important;
-}
-
-/* Form Styling */
-.stForm {
-    background: white !important;
-    padding: 2.2rem !important;
-    border-radius: 18px !important;
-    box-shadow: 0 6px 20px rgba(0, 0, 0, 0.12) !important;
-}
-
-.stSelectbox, .stSlider, .stToggle {
-    background: white !important;
-    border-radius: 14px !important;
-    padding: 0.7rem !important;
-}
-
-/* Download Button */
-.stDownloadButton > button {
-    background: linear-gradient(135deg, #3b82f6, #d97706) !important; /* Hardcoded --secondary, --accent */
-    color: white !important;
-    border: none !important;
-    border-radius: 14px !important;
-    padding: 1rem 2.2rem !important;
-    font-size: 1.05rem !important;
-    font-weight: 600 !important;
-    box-shadow: 0 4px 14px rgba(0, 0, 0, 0.2) !important;
-}
-
-.stDownloadButton > button:hover {
-    transform: translateY(-3px) !important;
-    box-shadow: 0 6px 20px rgba(0, 0, 0, 0.25) !important;
-    background: linear-gradient(135deg, #d97706, #3b82f6) !important; /* Hardcoded --accent, --secondary */
-}
-</style>
-""", unsafe_allow_html=True)
+@st.cache_data
+def load_css():
+    """Stylesheet from app/static, read once per process rather than per rerun."""
+    return (Path(__file__).resolve().parent / "static" / "style.css").read_text(encoding="utf-8")
+
+st.markdown(f"<style>\n{load_css()}</style>", unsafe_allow_html=True)
 
 # ============================
 # 🎮 Sidebar Navigation
@@ -298,25 +72,149 @@ with st.sidebar:
 # ============================
 # 🛰️ API & Data Paths
 # ============================
-ROOT_DIR = Path(__file__).resolve().parent.parent
 FEEDBACK_FILE = ROOT_DIR / "data" / "feedback.json"
+RATINGS_FILE = ROOT_DIR / "data" / "ratings.jsonl"
+CATEGORY_COUNTS_FILE = ROOT_DIR / "data" / "category_counts.json"
 API_CHAT_URL = "http://127.0.0.1:5000/chat"
+API_FEEDBACK_URL = "http://127.0.0.1:5000/feedback"
+API_INTERACTIONS_URL = "http://127.0.0.1:5000/interactions"
+API_TEXT_URL = "http://127.0.0.1:5000/interactions/text"
+API_SEARCH_URL = "http://127.0.0.1:5000/interactions/search"
+API_TOPICS_URL = "http://127.0.0.1:5000/topics"
+API_SETTINGS_URL = "http://127.0.0.1:5000/settings"
+API_ALERTS_URL = "http://127.0.0.1:5000/alerts"
+API_CATEGORIES_URL = "http://127.0.0.1:5000/categories"
+FEED_FIELDS = "id,timestamp,sentiment,category"  # text comes from /interactions/text on demand
+LIVE_REFRESH_SECONDS = 5
+
+def api_headers(request_id=None):
+    """Headers for an API call; the request id ties it to the API's trace and logs."""
+    return {REQUEST_ID_HEADER: request_id or new_request_id()}
+
+@st.cache_resource
+def ensure_feedback_file():
+    """Create feedback.json if needed, once per process; returns an error message or None."""
+    try:
+        if not FEEDBACK_FILE.parent.exists():
+            FEEDBACK_FILE.parent.mkdir(parents=True)
+            logger.debug(f"Created directory: {FEEDBACK_FILE.parent}")
+        if not FEEDBACK_FILE.exists():
+            with open(FEEDBACK_FILE, "w") as f:
+                json.dump([], f)
+            logger.debug(f"Created empty feedback.json at {FEEDBACK_FILE}")
+        if not os.access(FEEDBACK_FILE, os.R_OK | os.W_OK):
+            logger.error(f"Feedback file {FEEDBACK_FILE} is not readable/writable")
+            return f"Permission denied for {FEEDBACK_FILE}. Please check file permissions."
+    except Exception as e:
+        logger.error(f"Error initializing feedback.json: {str(e)}")
+        return f"Failed to initialize feedback.json: {str(e)}"
+    return None
 
-# Ensure feedback.json exists and is writable
-try:
-    if not FEEDBACK_FILE.parent.exists():
-        FEEDBACK_FILE.parent.mkdir(parents=True)
-        logger.debug(f"Created directory: {FEEDBACK_FILE.parent}")
-    if not FEEDBACK_FILE.exists():
-        with open(FEEDBACK_FILE, "w") as f:
-            json.dump([], f)
-        logger.debug(f"Created empty feedback.json at {FEEDBACK_FILE}")
-    if not os.access(FEEDBACK_FILE, os.R_OK | os.W_OK):
-        logger.error(f"Feedback file {FEEDBACK_FILE} is not readable/writable")
-        st.error(f"Permission denied for {FEEDBACK_FILE}. Please check file permissions.")
-except Exception as e:
-    logger.error(f"Error initializing feedback.json: {str(e)}")
-    st.error(f"Failed to initialize feedback.json: {str(e)}")
+feedback_file_error = ensure_feedback_file()
+if feedback_file_error:
+    st.error(feedback_file_error)
+
+@st.cache_resource
+def render_timings():
+    """Process-wide script run timings: the cold start and recent reruns per page."""
+    return {"cold_start_ms": None, "pages": {}}
+
+# ============================
+# 🔄 Live Interaction Feed
+# ============================
+def read_feedback_file():
+    """Compact full read of the history file, used when the API is not reachable."""
+    from analysis.dataload import load_interactions, set_labels
+    from services.store import load_ratings
+    return set_labels(load_interactions(FEEDBACK_FILE), "user_rating", load_ratings(RATINGS_FILE))
+
+def pull_interactions():
+    """Merge interactions added since the last pull into session state.
+
+    Only the delta after the stored cursor is fetched from the API, so each
+    refresh costs time proportional to new data. The cached frame holds
+    timestamp, labels and ids only; query/reply text is fetched on demand
+    with fetch_text().
+    """
+    from analysis.dataload import append_frames, compact_frame, set_labels
+    feed = st.session_state.setdefault("feed", {"cursor": None, "frame": None})
+    try:
+        response = requests.get(API_INTERACTIONS_URL, params={"cursor": feed["cursor"] or "", "fields": FEED_FIELDS},
+                                headers=api_headers(), timeout=5)
+        response.raise_for_status()
+        delta = response.json()
+    except requests.exceptions.RequestException as e:
+        logger.warning(f"Interaction feed unavailable: {str(e)}")
+        if feed["frame"] is None:
+            return read_feedback_file()
+        return feed["frame"]
+
+    start_seq = 0 if feed["frame"] is None else len(feed["frame"])
+    frame = append_frames(feed["frame"], compact_frame(delta["interactions"], start_seq=start_seq))
+    feed["frame"] = set_labels(frame, "user_rating", delta["ratings"])
+    feed["cursor"] = delta["cursor"]
+    return feed["frame"]
+
+def fetch_text(seqs):
+    """Query and reply text for a few rows, keyed by their ``seq``."""
+    import pandas as pd
+    from analysis.dataload import load_text
+    seqs = [int(s) for s in seqs]
+    try:
+        response = requests.get(API_TEXT_URL, params={"seq": ",".join(map(str, seqs))},
+                                headers=api_headers(), timeout=5)
+        response.raise_for_status()
+        return pd.DataFrame(response.json()["items"], columns=["seq", "user_query", "reply"])
+    except requests.exceptions.RequestException as e:
+        logger.warning(f"Text lookup via API failed, reading file: {str(e)}")
+        return load_text(FEEDBACK_FILE, seqs)
+
+def fetch_category_counts():
+    """Interaction count per service category, as maintained by the API."""
+    try:
+        response = requests.get(API_CATEGORIES_URL, headers=api_headers(), timeout=5)
+        response.raise_for_status()
+        return response.json()
+    except requests.exceptions.RequestException as e:
+        logger.warning(f"Category counts via API failed, reading file: {str(e)}")
+        from analysis.categories import load_category_counts
+        return load_category_counts(CATEGORY_COUNTS_FILE)
+
+def spike_banner():
+    """Banner for negative-sentiment spikes the API's detector is alarming on."""
+    try:
+        response = requests.get(API_ALERTS_URL, headers=api_headers(), timeout=5)
+        response.raise_for_status()
+        status = response.json()
+    except requests.exceptions.RequestException as e:
+        logger.warning(f"Spike alerts unavailable: {str(e)}")
+        return
+    for key in status["active"]:
+        series = status["series"][key]
+        scope = "all services" if key == "All" else key
+        window = series["current_window"]
+        st.error(
+            f"🚨 Negative sentiment spike ({scope}) since {series['alarm_since']}: "
+            f"{window['negative']} negative of {window['total']} interactions in the current "
+            f"{status['window_minutes']}-minute window, baseline {series['baseline_negative']}."
+        )
+
+def search_feedback(query):
+    """``seq`` of interactions whose query or reply contains ``query``."""
+    try:
+        response = requests.get(API_SEARCH_URL, params={"q": query}, headers=api_headers(), timeout=10)
+        response.raise_for_status()
+        return response.json()["seq"]
+    except requests.exceptions.RequestException as e:
+        logger.warning(f"Search via API failed, scanning file: {str(e)}")
+        from analysis.dataload import load_records, search_text
+        return search_text(load_records(FEEDBACK_FILE), query)
+
+# Re-run only the analytics view on a timer when this Streamlit has fragments.
+if hasattr(st, "fragment"):
+    live_fragment = st.fragment(run_every=LIVE_REFRESH_SECONDS)
+else:
+    live_fragment = lambda view: view
 
 # ============================
 # 💬 AI Assistant Interface
@@ -360,119 +258,105 @@ if choice == "AI Assistant":
         else:
             with output_container:
                 with st.spinner("Processing your inquiry..."):
+                    request_id = new_request_id()
                     try:
-                        response = requests.post(API_CHAT_URL, json={"query": query})
+                        response = requests.post(API_CHAT_URL, json={"query": query}, headers=api_headers(request_id))
+                        if response.status_code == 429:
+                            retry_after = response.headers.get("Retry-After", "a few")
+                            logger.warning(f"Chat request {request_id} shed by API, retry after {retry_after}s")
+                            st.warning(f"The assistant is handling many inquiries right now. Please try again in {retry_after} seconds.")
+                            st.stop()
                         response.raise_for_status()
                         result = response.json()
-                        logger.debug(f"API response: {result}")
-
-                        st.markdown("""
-                        <div class="card fade-in">
-                            <div style="display: flex; align-items: center; gap: 0.8rem; margin-bottom: 1rem;">
-                                <div style="width: 14px; height: 14px; background: #d97706; border-radius: 50%;"></div>
-                                <h4 style="margin: 0; font-size: 1.3rem; color: #1e40af;">Response</h4>
-                            </div>
-                            <div style="margin-top: 0.5rem; padding-left: 1.5rem; font-size: 0.95rem; color: #111827;">
-                                {}
-                            </div>
-                        </div>
-                        """.format(result.get('reply', 'We could not process your inquiry at this time. Please try again later.')), unsafe_allow_html=True)
-
-                        sentiment = result.get('sentiment', 'NEUTRAL')
-                        sentiment_class = f"badge-{sentiment.lower()}"
-
-                        st.markdown("""
-                        <div class="card fade-in" style="animation-delay: 0.3s;">
-                            <div style="display: flex; justify-content: space-between; align-items: center;">
-                                <div style="display: flex; align-items: center; gap: 0.8rem;">
-                                    <div style="width: 14px; height: 14px; background: #d97706; border-radius: 50%;"></div>
-                                    <h4 style="margin: 0; font-size: 1.3rem; color: #1e40af;">Sentiment</h4>
-                                </div>
-                                <span class="badge {}">{}</span>
-                            </div>
-                        </div>
-                        """.format(sentiment_class, sentiment), unsafe_allow_html=True)
-
-                        # Feedback Submission Feature
-                        st.markdown("""
-                        <div class="card fade-in" style="animation-delay: 0.5s;">
-                            <h4 style="margin: 0 0 1rem; font-size: 1.3rem; color: #1e40af;">Rate this Response</h4>
-                            <p style="color: #6b7280; font-size: 0.95rem;">Was this response helpful?</p>
-                        </div>
-                        """, unsafe_allow_html=True)
-
-                        col1, col2 = st.columns(2)
-                        with col1:
-                            if st.button("👍 Thumbs Up", key="thumbs_up"):
-                                feedback_rating = "POSITIVE"
-                                feedback_data = {
-                                    "timestamp": datetime.now().isoformat(),
-                                    "user_query": query,
-                                    "reply": result.get('reply', ''),
-                                    "sentiment": sentiment,
-                                    "user_rating": feedback_rating
-                                }
-                                try:
-                                    with open(FEEDBACK_FILE, "r+") as f:
-                                        try:
-                                            data = json.load(f)
-                                            logger.debug(f"Loaded feedback.json for writing: {len(data)} records")
-                                        except json.JSONDecodeError:
-                                            logger.warning("Corrupted feedback.json detected, resetting to empty list")
-                                            data = []
-                                        data.append(feedback_data)
-                                        f.seek(0)
-                                        json.dump(data, f, indent=2)
-                                        logger.debug("Feedback saved successfully")
-                                    st.success("Thank you for your feedback!")
-                                    time.sleep(1)
-                                    st.rerun()
-                                except Exception as e:
-                                    logger.error(f"Error writing feedback: {str(e)}")
-                                    st.error(f"Failed to save feedback: {str(e)}")
-                        with col2:
-                            if st.button("👎 Thumbs Down", key="thumbs_down"):
-                                feedback_rating = "NEGATIVE"
-                                feedback_data = {
-                                    "timestamp": datetime.now().isoformat(),
-                                    "user_query": query,
-                                    "reply": result.get('reply', ''),
-                                    "sentiment": sentiment,
-                                    "user_rating": feedback_rating
-                                }
-                                try:
-                                    with open(FEEDBACK_FILE, "r+") as f:
-                                        try:
-                                            data = json.load(f)
-                                            logger.debug(f"Loaded feedback.json for writing: {len(data)} records")
-                                        except json.JSONDecodeError:
-                                            logger.warning("Corrupted feedback.json detected, resetting to empty list")
-                                            data = []
-                                        data.append(feedback_data)
-                                        f.seek(0)
-                                        json.dump(data, f, indent=2)
-                                        logger.debug("Feedback saved successfully")
-                                    st.success("Thank you for your feedback!")
-                                    time.sleep(1)
-                                    st.rerun()
-                                except Exception as e:
-                                    logger.error(f"Error writing feedback: {str(e)}")
-                                    st.error(f"Failed to save feedback: {str(e)}")
+                        # Kept in session state so the rating buttons, which
+                        # trigger a rerun, can still see the answer they rate.
+                        st.session_state["last_chat"] = {"query": query, "result": result, "rated": False}
 
                     except requests.exceptions.RequestException as e:
-                        logger.error(f"API request failed: {str(e)}")
-                        st.error(f"Service unavailable: Please ensure the backend service is running. Error: {str(e)}")
+                        logger.error(f"API request {request_id} failed: {str(e)}")
+                        st.error(f"Service unavailable: Please ensure the backend service is running. Error: {str(e)} (reference {request_id})")
                     except json.JSONDecodeError:
-                        logger.error("Invalid JSON response from API")
-                        st.error("Invalid response format from government service")
+                        logger.error(f"Invalid JSON response from API for request {request_id}")
+                        st.error(f"Invalid response format from government service (reference {request_id})")
                     except Exception as e:
-                        logger.error(f"Unexpected error in AI Assistant: {str(e)}")
-                        st.error(f"Error processing your inquiry: {str(e)}")
+                        logger.error(f"Unexpected error in AI Assistant for request {request_id}: {str(e)}")
+                        st.error(f"Error processing your inquiry: {str(e)} (reference {request_id})")
+
+    last_chat = st.session_state.get("last_chat")
+    if last_chat:
+        result = last_chat["result"]
+        with output_container:
+            st.markdown("""
+            <div class="card fade-in">
+                <div style="display: flex; align-items: center; gap: 0.8rem; margin-bottom: 1rem;">
+                    <div style="width: 14px; height: 14px; background: #d97706; border-radius: 50%;"></div>
+                    <h4 style="margin: 0; font-size: 1.3rem; color: #1e40af;">Response</h4>
+                </div>
+                <div style="margin-top: 0.5rem; padding-left: 1.5rem; font-size: 0.95rem; color: #111827;">
+                    {}
+                </div>
+            </div>
+            """.format(result.get('reply', 'We could not process your inquiry at this time. Please try again later.')), unsafe_allow_html=True)
+
+            sentiment = result.get('sentiment', 'NEUTRAL')
+            sentiment_class = f"badge-{sentiment.lower()}"
+
+            st.markdown("""
+            <div class="card fade-in" style="animation-delay: 0.3s;">
+                <div style="display: flex; justify-content: space-between; align-items: center;">
+                    <div style="display: flex; align-items: center; gap: 0.8rem;">
+                        <div style="width: 14px; height: 14px; background: #d97706; border-radius: 50%;"></div>
+                        <h4 style="margin: 0; font-size: 1.3rem; color: #1e40af;">Sentiment</h4>
+                    </div>
+                    <span class="badge {}">{}</span>
+                </div>
+            </div>
+            """.format(sentiment_class, sentiment), unsafe_allow_html=True)
+
+            # Feedback Submission Feature
+            st.markdown("""
+            <div class="card fade-in" style="animation-delay: 0.5s;">
+                <h4 style="margin: 0 0 1rem; font-size: 1.3rem; color: #1e40af;">Rate this Response</h4>
+                <p style="color: #6b7280; font-size: 0.95rem;">Was this response helpful?</p>
+            </div>
+            """, unsafe_allow_html=True)
+
+            if last_chat["rated"]:
+                st.success("Thank you for your feedback!")
+            elif not result.get("id"):
+                st.info("Rating is unavailable for this response.")
+            else:
+                feedback_rating = None
+                col1, col2 = st.columns(2)
+                with col1:
+                    if st.button("👍 Thumbs Up", key="thumbs_up"):
+                        feedback_rating = "POSITIVE"
+                with col2:
+                    if st.button("👎 Thumbs Down", key="thumbs_down"):
+                        feedback_rating = "NEGATIVE"
+
+                if feedback_rating:
+                    try:
+                        response = requests.post(
+                            API_FEEDBACK_URL,
+                            json={"interaction_id": result["id"], "rating": feedback_rating},
+                            headers=api_headers(),
+                            timeout=10
+                        )
+                        response.raise_for_status()
+                        logger.debug("Feedback saved successfully")
+                        last_chat["rated"] = True
+                        st.rerun()
+                    except requests.exceptions.RequestException as e:
+                        logger.error(f"Error submitting feedback: {str(e)}")
+                        st.error(f"Failed to save feedback: {str(e)}")
 
 # ============================
 # 📊 Sentiment Analysis Dashboard
 # ============================
 elif choice == "Sentiment Analysis":
+    import plotly.express as px
+
     st.markdown("""
     <div style="text-align: center; margin-bottom: 2.5rem;">
         <h1>Sentiment Analysis</h1>
@@ -493,46 +377,17 @@ elif choice == "Sentiment Analysis":
     </div>
     """, unsafe_allow_html=True)
 
-    try:
-        if not FEEDBACK_FILE.exists() or FEEDBACK_FILE.stat().st_size == 0:
-            logger.warning("Feedback file missing or empty")
-            st.warning("No citizen feedback data available yet. Please ensure feedback.json exists and contains valid data.")
-        else:
-            with open(FEEDBACK_FILE, "r") as f:
-                try:
-                    data = json.load(f)
-                    logger.debug(f"Loaded feedback.json with {len(data)} records")
-                except json.JSONDecodeError as e:
-                    logger.error(f"Failed to parse feedback.json: {str(e)}")
-                    st.error(f"Failed to parse feedback.json: {str(e)}. Please ensure the file contains valid JSON.")
-                    data = None
-
-            if not data or not isinstance(data, list):
-                logger.warning("Feedback data is empty or not a list")
-                st.warning("No valid citizen feedback data available in feedback.json.")
+    @live_fragment
+    def sentiment_analysis_view():
+        spike_banner()
+        try:
+            # Compact frame: seq, id, timestamp and categorical labels only
+            df = pull_interactions()
+            if df.empty:
+                logger.warning("No interaction records available")
+                st.warning("No citizen feedback data available yet.")
             else:
-                df = pd.DataFrame(data)
-                logger.debug(f"DataFrame created with shape {df.shape}")
-
-                # Define expected columns
-                expected_columns = ['timestamp', 'user_query', 'reply', 'sentiment', 'user_rating']
-                for col in expected_columns:
-                    if col not in df.columns:
-                        df[col] = None
-                        logger.debug(f"Added missing column: {col}")
-
-                # Handle timestamp
-                if df['timestamp'].isna().all():
-                    df['timestamp'] = pd.to_datetime([datetime.now()] * len(df))
-                    logger.debug("Set default timestamps")
-                else:
-                    df['timestamp'] = pd.to_datetime(df['timestamp'], errors='coerce')
-                    logger.debug("Converted timestamps")
-
-                # Ensure sentiment and user_rating are strings
-                df['sentiment'] = df['sentiment'].fillna('NEUTRAL').astype(str)
-                df['user_rating'] = df['user_rating'].fillna('NEUTRAL').astype(str)
-                logger.debug("Normalized sentiment and user_rating columns")
+                st.caption(f"{len(df)} interactions · {df.memory_usage(deep=True).sum() / 1024:.1f} KB in memory")
 
                 # New Search Feature
                 st.markdown("""
@@ -550,11 +405,7 @@ elif choice == "Sentiment Analysis":
 
                 filtered_df = df
                 if search_query.strip():
-                    filtered_df = df[
-                        df['user_query'].str.contains(search_query, case=False, na=False) |
-                        df['reply'].str.contains(search_query, case=False, na=False)
-                    ]
-                    logger.debug(f"Search applied, filtered DataFrame shape: {filtered_df.shape}")
+                    filtered_df = df[df['seq'].isin(search_feedback(search_query.strip()))]
 
                 # Filtering Feature
                 st.markdown("""
@@ -577,7 +428,6 @@ elif choice == "Sentiment Analysis":
                     elif "Rating" in filter_option:
                         rating_value = filter_option.split()[0].upper()
                         filtered_df = filtered_df[filtered_df['user_rating'] == rating_value]
-                    logger.debug(f"Filter applied, filtered DataFrame shape: {filtered_df.shape}")
 
                 # Export Feature
                 st.markdown("""
@@ -586,14 +436,18 @@ elif choice == "Sentiment Analysis":
                     <div style="height: 4px; background: linear-gradient(90deg, #1e40af, #d97706); margin-bottom: 1rem; width: 80px; border-radius: 2px;"></div>
                 </div>
                 """, unsafe_allow_html=True)
-                csv = filtered_df.to_csv(index=False)
-                st.download_button(
-                    label="Download Filtered Feedback as CSV",
-                    data=csv,
-                    file_name="citizen_feedback_filtered.csv",
-                    mime="text/csv",
-                    key="download_feedback"
-                )
+                # Text is only loaded once an export is actually requested
+                if st.button("Prepare CSV Export", key="prepare_export"):
+                    export_df = filtered_df.merge(fetch_text(filtered_df['seq']), on='seq', how='left')
+                    st.session_state["export_csv"] = export_df.drop(columns=['seq']).to_csv(index=False)
+                if "export_csv" in st.session_state:
+                    st.download_button(
+                        label="Download Filtered Feedback as CSV",
+                        data=st.session_state["export_csv"],
+                        file_name="citizen_feedback_filtered.csv",
+                        mime="text/csv",
+                        key="download_feedback"
+                    )
 
                 col1, col2 = st.columns(2)
                 with col1:
@@ -640,7 +494,7 @@ elif choice == "Sentiment Analysis":
                     </div>
                     """, unsafe_allow_html=True)
 
-                    trend_data = filtered_df.groupby([filtered_df['timestamp'].dt.date, 'sentiment']).size().reset_index(name='count')
+                    trend_data = filtered_df.groupby([filtered_df['timestamp'].dt.date, 'sentiment'], observed=True).size().reset_index(name='count')
                     trend_data.rename(columns={'timestamp': 'date'}, inplace=True)
 
                     line_fig = px.line(
@@ -682,9 +536,11 @@ elif choice == "Sentiment Analysis":
                 </div>
                 """, unsafe_allow_html=True)
 
-                display_columns = [col for col in ['timestamp', 'user_query', 'reply', 'sentiment', 'user_rating'] if col in filtered_df.columns]
+                recent_df = filtered_df.tail(10).iloc[::-1]
+                recent_df = recent_df.merge(fetch_text(recent_df['seq']), on='seq', how='left')
+                display_columns = ['timestamp', 'user_query', 'reply', 'sentiment', 'user_rating']
                 st.dataframe(
-                    filtered_df[display_columns].tail(10).iloc[::-1],
+                    recent_df[display_columns],
                     use_container_width=True,
                     column_config={
                         "timestamp": "Date/Time",
@@ -695,14 +551,19 @@ elif choice == "Sentiment Analysis":
                     }
                 )
 
-    except Exception as e:
-        logger.error(f"Error in Sentiment Analysis: {str(e)}")
-        st.error(f"Error loading citizen feedback: {str(e)}. Please ensure feedback.json is valid and accessible.")
+        except Exception as e:
+            logger.error(f"Error in Sentiment Analysis: {str(e)}")
+            st.error(f"Error loading citizen feedback: {str(e)}. Please ensure feedback.json is valid and accessible.")
+
+    sentiment_analysis_view()
 
 # ============================
 # 📈 Citizen Dashboard Interface
 # ============================
 elif choice == "Citizen Dashboard":
+    import pandas as pd
+    import plotly.express as px
+
     st.markdown("""
     <div style="text-align: center; margin-bottom: 2.5rem;">
         <h1>Citizen Engagement Dashboard</h1>
@@ -723,39 +584,15 @@ elif choice == "Citizen Dashboard":
     </div>
     """, unsafe_allow_html=True)
 
-    try:
-        if not FEEDBACK_FILE.exists() or FEEDBACK_FILE.stat().st_size == 0:
-            logger.warning("Feedback file missing or empty in Citizen Dashboard")
-            st.warning("No interaction data available yet. Please ensure feedback.json exists and contains valid data.")
-        else:
-            with open(FEEDBACK_FILE, "r") as f:
-                try:
-                    data = json.load(f)
-                    logger.debug(f"Loaded feedback.json with {len(data)} records for dashboard")
-                except json.JSONDecodeError as e:
-                    logger.error(f"Failed to parse feedback.json in dashboard: {str(e)}")
-                    st.error(f"Failed to parse feedback.json: {str(e)}. Please ensure the file contains valid JSON.")
-                    data = None
-
-            if not data or not isinstance(data, list):
-                logger.warning("Dashboard feedback data is empty or not a list")
-                st.warning("No valid interaction data available in feedback.json.")
+    @live_fragment
+    def citizen_dashboard_view():
+        spike_banner()
+        try:
+            df = pull_interactions()
+            if df.empty:
+                logger.warning("No interaction records available in Citizen Dashboard")
+                st.warning("No interaction data available yet.")
             else:
-                df = pd.DataFrame(data)
-
-                # Define expected columns
-                expected_columns = ['timestamp', 'user_query', 'reply', 'sentiment', 'user_rating']
-                for col in expected_columns:
-                    if col not in df.columns:
-                        df[col] = None
-                        logger.debug(f"Added missing column in dashboard: {col}")
-
-                if 'timestamp' not in df.columns or df['timestamp'].isna().all():
-                    df['timestamp'] = pd.to_datetime([datetime.now()] * len(df))
-                    logger.debug("Set default timestamps in dashboard")
-                else:
-                    df['timestamp'] = pd.to_datetime(df['timestamp'], errors='coerce')
-                    logger.debug("Converted timestamps in dashboard")
 
                 col1, col2, col3 = st.columns(3)
                 with col1:
@@ -791,11 +628,90 @@ elif choice == "Citizen Dashboard":
                 </div>
                 """, unsafe_allow_html=True)
 
-                st.warning("Service categorization feature coming soon")
+                category_counts = fetch_category_counts()
+                if not category_counts:
+                    st.info("No categorized interactions yet. Run `python -m scripts.backfill_categories` to label existing history.")
+                else:
+                    category_df = pd.DataFrame(
+                        sorted(category_counts.items(), key=lambda item: item[1]),
+                        columns=['category', 'count']
+                    )
+                    bar_fig = px.bar(
+                        category_df,
+                        x='count',
+                        y='category',
+                        orientation='h',
+                        color_discrete_sequence=["#1e40af"]
+                    )
+                    bar_fig.update_layout(
+                        margin=dict(l=20, r=20, t=20, b=20),
+                        font=dict(size=14, color='#111827'),  # Hardcoded --dark
+                        xaxis_title="Interactions",
+                        yaxis_title="",
+                        paper_bgcolor="rgba(0,0,0,0)",
+                        plot_bgcolor="rgba(0,0,0,0)"
+                    )
+                    st.plotly_chart(bar_fig, use_container_width=True)
+
+                st.markdown("""
+                <div style="margin: 2.5rem 0 1rem;">
+                    <h3 style="font-size: 1.4rem; color: #1e40af;">Complaint Topics</h3>
+                    <div style="height: 4px; background: linear-gradient(90deg, #1e40af, #d97706); margin-bottom: 1rem; width: 80px; border-radius: 2px;"></div>
+                </div>
+                """, unsafe_allow_html=True)
 
-    except Exception as e:
-        logger.error(f"Error in Citizen Dashboard: {str(e)}")
-        st.error(f"Error loading dashboard data: {str(e)}. Please ensure feedback.json is valid and accessible.")
+                try:
+                    response = requests.get(API_TOPICS_URL, headers=api_headers(), timeout=5)
+                    response.raise_for_status()
+                    topic_summary = response.json()
+                except requests.exceptions.RequestException as e:
+                    logger.warning(f"Topic summary unavailable: {str(e)}")
+                    topic_summary = None
+
+                if topic_summary is None:
+                    st.info("Topic clusters are served by the API; start the backend to see them.")
+                elif not topic_summary:
+                    st.info("No topics yet. Run `python -m scripts.build_topics` to cluster existing history.")
+                else:
+                    topic_df = pd.DataFrame([
+                        {
+                            "Topic": ", ".join(topic["terms"]),
+                            "Volume": topic["volume"],
+                            "Negative Share": f"{topic['negative_share']:.0%}",
+                        }
+                        for topic in topic_summary
+                    ])
+                    st.dataframe(topic_df, use_container_width=True, hide_index=True)
+
+                    series_df = pd.DataFrame([
+                        {"date": point["date"], "topic": ", ".join(topic["terms"][:2]), "volume": point["volume"]}
+                        for topic in topic_summary[:5]
+                        for point in topic["series"]
+                    ])
+                    if not series_df.empty:
+                        topic_fig = px.line(series_df, x='date', y='volume', color='topic', markers=True)
+                        topic_fig.update_layout(
+                            margin=dict(l=20, r=20, t=20, b=20),
+                            font=dict(size=14, color='#111827'),  # Hardcoded --dark
+                            xaxis_title="Date",
+                            yaxis_title="Interactions",
+                            legend=dict(
+                                orientation="h",
+                                yanchor="bottom",
+                                y=-0.3,
+                                xanchor="center",
+                                x=0.5
+                            ),
+                            paper_bgcolor="rgba(0,0,0,0)",
+                            plot_bgcolor="rgba(0,0,0,0)"
+                        )
+                        st.plotly_chart(topic_fig, use_container_width=True)
+
+        except Exception as e:
+            logger.error(f"Error in Citizen Dashboard: {str(e)}")
+            st.error(f"Error loading dashboard data: {str(e)}. Please ensure feedback.json is valid and accessible.")
+
+    citizen_dashboard_view()
 
 # ============================
 # ⚙️ System Settings Interface
@@ -821,6 +737,17 @@ elif choice == "System Settings":
     </div>
     """, unsafe_allow_html=True)
 
+    try:
+        current = requests.get(API_SETTINGS_URL, headers=api_headers(), timeout=5).json()
+    except requests.exceptions.RequestException as e:
+        logger.error(f"Could not read settings: {str(e)}")
+        st.warning("Backend unreachable; showing default settings.")
+        current = {"detail_level": 3, "models": ["IBM Granite Standard", "IBM Granite Advanced"], "model": None}
+    if current.get("loading_model"):
+        st.info(f"Loading {current['loading_model']}; {current.get('model')} keeps answering until it is ready.")
+    elif current.get("load_error"):
+        st.error(f"Could not switch to {current['load_error']['model']}: {current['load_error']['error']}")
+
     with st.form("system_config"):
         col1, col2 = st.columns(2)
         with col1:
@@ -830,19 +757,23 @@ elif choice == "System Settings":
                 index=0,
                 help="Set the tone for government responses"
             )
-            st.slider(
+            detail_level = st.slider(
                 "Response Detail Level",
                 min_value=1,
                 max_value=5,
-                value=3,
+                value=current["detail_level"],
                 help="Control the level of detail in responses"
             )
         with col2:
-            st.selectbox(
+            models = current["models"]
+            local_models_enabled = current.get("local_models_enabled", False)
+            model = st.selectbox(
                 "AI Model",
-                ["IBM Granite Standard", "IBM Granite Advanced", "IBM Watson"],
-                index=0,
-                help="Select the AI model for responses"
+                models,
+                index=models.index(current["model"]) if current.get("model") in models else 0,
+                disabled=not local_models_enabled,
+                help="Select the AI model for responses" if local_models_enabled
+                else "Local models are disabled on this server; answers come from Groq"
             )
             st.toggle(
                 "Enable Follow-up Suggestions",
@@ -850,5 +781,47 @@ elif choice == "System Settings":
                 help="Show suggested follow-up questions"
             )
         if st.form_submit_button("Save Configuration"):
-            st.success("Configuration updated successfully")
-            time.sleep(1)
\ No newline at end of file
+            payload = {"detail_level": detail_level}
+            if local_models_enabled and model != current.get("model"):
+                payload["model"] = model
+            try:
+                response = requests.post(
+                    API_SETTINGS_URL,
+                    json=payload,
+                    headers=api_headers(),
+                    timeout=10
+                )
+                if response.ok:
+                    st.success("Configuration updated successfully")
+                else:
+                    st.error(response.json().get("error", f"HTTP {response.status_code}"))
+            except requests.exceptions.RequestException as e:
+                logger.error(f"Could not save settings: {str(e)}")
+                st.error("Could not reach the backend to save the configuration.")
+
+    with st.expander("Frontend render timing"):
+        timings = render_timings()
+        if timings["cold_start_ms"] is not None:
+            st.caption(f"Cold start (first script run in this process): {timings['cold_start_ms']:.0f} ms")
+        st.table([
+            {
+                "Page": page,
+                "Runs": len(samples),
+                "Median rerun (ms)": round(sorted(samples)[len(samples) // 2], 1),
+                "Last rerun (ms)": round(samples[-1], 1),
+            }
+            for page, samples in timings["pages"].items()
+        ])
+
+# ============================
+# ⏱️ Render Timing
+# ============================
+# Full script runs only; live fragment refreshes do not reach this point.
+_run_ms = (time.perf_counter() - _run_started) * 1000
+_timings = render_timings()
+if _timings["cold_start_ms"] is None:
+    _timings["cold_start_ms"] = _run_ms
+    logger.info(f"Cold start: first run ({choice}) took {_run_ms:.0f} ms")
+else:
+    _timings["pages"].setdefault(choice, deque(maxlen=100)).append(_run_ms)
+    logger.debug(f"Rerun of {choice} took {_run_ms:.1f} ms")
@@ -0,0 +1,52 @@
+"""Label stored interactions with a service category and rebuild the counters.
+
+Usage:
+    python -m scripts.backfill_categories [--all]
+
+By default only interactions without a category are classified; --all
+re-labels everything (e.g. after editing data/service_categories.json).
+Run from the cityAI directory.
+"""
+import argparse
+import time
+from collections import Counter
+
+from analysis.categories import CategoryClassifier, save_category_counts
+from services.store import InteractionStore
+
+CHUNK_SIZE = 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--all", action="store_true", help="re-label interactions that already have a category")
+    args = parser.parse_args()
+
+    classifier = CategoryClassifier()
+    store = InteractionStore()
+    labelled = 0
+
+    def backfill(records):
+        nonlocal labelled
+        todo = [r for r in records if args.all or not r.get("category")]
+        for start in range(0, len(todo), CHUNK_SIZE):
+            chunk = todo[start:start + CHUNK_SIZE]
+            for record, category in zip(chunk, classifier.classify_batch([r.get("user_query", "") for r in chunk])):
+                record["category"] = category
+        labelled = len(todo)
+        return records
+
+    started = time.perf_counter()
+    with store.locked():
+        records = store.rewrite(backfill)
+        counts = Counter(r["category"] for r in records if r.get("category"))
+        save_category_counts(dict(counts))
+    elapsed = time.perf_counter() - started
+
+    print(f"Labelled {labelled} of {len(records)} interactions in {elapsed:.2f}s")
+    for category, count in counts.most_common():
+        print(f"  {category:<28} {count}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Backtest the negative-sentiment spike detector over stored interactions.
+
+Usage:
+    python -m scripts.backtest_spikes [--window-minutes 60] [--threshold 4] [--save]
+
+Replays the history in order through a fresh detector and prints every
+alert it would have raised, so thresholds can be tuned against known
+incidents. ``--save`` writes the replayed detector as the API's live
+state (data/spike_state.json); run that while the API is stopped, since
+the API checkpoints the same file. The API rebuilds the state on startup
+if its SPIKE_* settings differ from the ones saved, so ``--save`` prints
+the settings to give it.
+"""
+import argparse
+import time
+
+from analysis.spikes import STATE_FILE, SpikeDetector
+from services.store import InteractionStore
+
+
+# Detector parameter -> environment variable the API reads it from.
+ENV_NAMES = {
+    "window_minutes": "SPIKE_WINDOW_MINUTES", "alpha": "SPIKE_ALPHA", "k": "SPIKE_SLACK",
+    "h": "SPIKE_THRESHOLD", "warmup": "SPIKE_WARMUP", "min_negative": "SPIKE_MIN_NEGATIVE",
+    "min_sd": "SPIKE_MIN_SD", "per_category": "SPIKE_PER_CATEGORY", "max_gap": "SPIKE_MAX_GAP",
+}
+
+
+def env_settings(params: dict) -> dict:
+    return {ENV_NAMES[key]: int(value) if isinstance(value, bool) else value for key, value in params.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--window-minutes", type=int, default=60)
+    parser.add_argument("--threshold", type=float, default=4.0, help="CUSUM decision threshold h, in SDs")
+    parser.add_argument("--slack", type=float, default=0.5, help="CUSUM slack k, in SDs")
+    parser.add_argument("--alpha", type=float, default=0.1, help="EWMA smoothing of the baseline")
+    parser.add_argument("--warmup", type=int, default=24, help="windows learned before alerting")
+    parser.add_argument("--min-negative", type=int, default=3)
+    parser.add_argument("--overall-only", action="store_true", help="skip per-category series")
+    parser.add_argument("--save", action="store_true", help="write the result as the live detector state")
+    args = parser.parse_args()
+
+    records = InteractionStore().load()
+    started = time.perf_counter()
+    detector, raised = SpikeDetector.replay(
+        records,
+        window_minutes=args.window_minutes,
+        alpha=args.alpha,
+        k=args.slack,
+        h=args.threshold,
+        warmup=args.warmup,
+        min_negative=args.min_negative,
+        per_category=not args.overall_only,
+    )
+    elapsed = time.perf_counter() - started
+
+    print(f"Replayed {len(records)} interactions in {elapsed:.2f}s "
+          f"({elapsed / max(len(records), 1) * 1e6:.1f} µs each)")
+    print(f"Alerts raised: {len(raised)}")
+    for alert in raised:
+        print(f"  {alert['window_start']}  {alert['key']:<24} {alert['negative']:>4} negative "
+              f"of {alert['total']:<4} baseline {alert['baseline']:<6} z {alert['z']}")
+
+    status = detector.status()
+    print()
+    for key, series in sorted(status["series"].items()):
+        state = "ALARM" if series["alarm"] else ("warming up" if series["warming_up"] else "ok")
+        print(f"  {key:<24} {state:<11} baseline {series['baseline_negative']:<6} cusum {series['cusum']}")
+
+    if args.save:
+        detector.save(STATE_FILE)
+        print(f"\nSaved detector state to {STATE_FILE}. Start the API with these settings to keep it:")
+        for name, value in env_settings(detector.params()).items():
+            print(f"  {name}={value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Answer a backlog of citizen inquiries through the /chat/batch endpoint.
+
+Usage:
+    python scripts/batch_process.py inquiries.csv results.jsonl
+
+The input is a CSV file with a "query" column (and optional "id" column) or
+a JSON array. Results are appended to the output JSONL file as they stream
+back. Re-running the same command after a failure skips ids that already
+have a result.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+
+import requests
+
+API_BATCH_URL = "http://127.0.0.1:5000/chat/batch"
+
+
+def load_items(path):
+    # utf-8-sig drops the byte-order mark of Excel's "CSV UTF-8" exports,
+    # which would otherwise end up in the first column name.
+    if path.endswith(".csv"):
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            rows = list(csv.DictReader(f))
+    else:
+        with open(path, encoding="utf-8-sig") as f:
+            rows = json.load(f)
+
+    items = []
+    for index, row in enumerate(rows):
+        if isinstance(row, str):
+            row = {"query": row}
+        query = (row.get("query") or "").strip()
+        if query:
+            items.append({"id": str(row.get("id") or index), "query": query})
+    return items
+
+
+def load_done_ids(path):
+    done = set()
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    done.add(json.loads(line)["id"])
+                except (ValueError, KeyError):
+                    continue  # a partially written last line from a crash
+    return done
+
+
+def run_chunk(api_url, chunk, out):
+    """Send one chunk and write its results; returns seconds to back off, or 0."""
+    with requests.post(api_url, json=chunk, stream=True, timeout=600) as response:
+        if response.status_code == 429:
+            return int(response.headers.get("Retry-After", "5"))
+        response.raise_for_status()
+        for line in response.iter_lines(decode_unicode=True):
+            if not line:
+                continue
+            record = json.loads(line)
+            if "error" in record:
+                return record.get("retry_after", 5)
+            if "progress" in record:
+                continue
+            out.write(json.dumps(record) + "\n")
+            out.flush()
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("input", help="CSV or JSON file of queries")
+    parser.add_argument("output", help="JSONL file to append results to")
+    parser.add_argument("--api-url", default=API_BATCH_URL)
+    parser.add_argument("--chunk-size", type=int, default=64, help="queries per HTTP request")
+    args = parser.parse_args()
+
+    items = load_items(args.input)
+    done = load_done_ids(args.output)
+    todo = [item for item in items if item["id"] not in done]
+    print(f"{len(items)} queries, {len(done)} already done, {len(todo)} to process")
+
+    started = time.monotonic()
+    with open(args.output, "a", encoding="utf-8") as out:
+        while todo:
+            chunk = todo[:args.chunk_size]
+            backoff = run_chunk(args.api_url, chunk, out)
+            finished = load_done_ids(args.output)
+            todo = [item for item in todo if item["id"] not in finished]
+            processed = len(items) - len(todo)
+            rate = (processed - len(done)) / max(time.monotonic() - started, 1e-9)
+            print(f"\r{processed}/{len(items)} done ({rate:.2f} queries/s)", end="", file=sys.stderr)
+            if backoff:
+                print(f"\nServer busy, retrying in {backoff}s", file=sys.stderr)
+                time.sleep(backoff)
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""Time Streamlit script runs of the dashboard, per page.
+
+Usage:
+    python -m scripts.bench_app [--reruns 10]
+
+Runs app/app.py headless with Streamlit's AppTest. The first run is the
+cold start (fresh process, landing on the AI Assistant page); each page is
+then selected and re-run ``--reruns`` times. The backend does not need to
+be running: pages fall back to reading data/ directly.
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+from streamlit.testing.v1 import AppTest
+
+APP_FILE = Path(__file__).resolve().parent.parent / "app" / "app.py"
+PAGES = ["AI Assistant", "Sentiment Analysis", "Citizen Dashboard", "System Settings"]
+
+
+def timed_run(app):
+    started = time.perf_counter()
+    app.run()
+    return (time.perf_counter() - started) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--reruns", type=int, default=10)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    args = parser.parse_args()
+
+    heavy = ("pandas", "plotly")
+    app = AppTest.from_file(str(APP_FILE), default_timeout=args.timeout)
+    cold_ms = timed_run(app)
+    print(f"Cold start:  {cold_ms:8.1f} ms  (analytics stack loaded: "
+          f"{', '.join(m for m in heavy if m in sys.modules) or 'no'})")
+
+    for page in PAGES:
+        app.sidebar.radio[0].set_value(page)
+        first_ms = timed_run(app)
+        reruns = sorted(timed_run(app) for _ in range(args.reruns))
+        median = reruns[len(reruns) // 2] if reruns else 0.0
+        print(f"{page:20}  first {first_ms:8.1f} ms  median rerun {median:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
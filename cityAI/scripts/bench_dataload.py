@@ -0,0 +1,44 @@
+"""Compare the naive and compact DataFrame loaders on the stored history.
+
+Usage:
+    python -m scripts.bench_dataload [--repeat 5]
+
+Reports load time and DataFrame memory for the full-record frame the
+dashboards used to build and for the column-projected compact frame.
+"""
+import argparse
+import time
+
+import pandas as pd
+
+from analysis.dataload import load_interactions, load_records, memory_report
+from services.store import FEEDBACK_FILE
+
+
+def best_of(repeat, fn):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    report = memory_report(load_records(FEEDBACK_FILE))
+    full_time = best_of(args.repeat, lambda: pd.DataFrame(load_records(FEEDBACK_FILE)))
+    compact_time = best_of(args.repeat, lambda: load_interactions(FEEDBACK_FILE))
+
+    print(f"Rows:            {report['rows']}")
+    print(f"Full frame:      {report['full_bytes'] / 1024:10.1f} KB  {full_time * 1000:8.1f} ms")
+    print(f"Compact frame:   {report['compact_bytes'] / 1024:10.1f} KB  {compact_time * 1000:8.1f} ms")
+    if report["compact_bytes"]:
+        print(f"Memory saved:    {1 - report['compact_bytes'] / report['full_bytes']:.0%}")
+
+
+if __name__ == "__main__":
+    main()
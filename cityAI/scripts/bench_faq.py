@@ -0,0 +1,65 @@
+"""Replay stored citizen queries against the FAQ index.
+
+Usage:
+    python -m scripts.bench_faq [--answer-threshold 0.45] [--context-threshold 0.25] [--min-terms 2]
+
+Reports how long the index takes to build, per-query search latency, and
+the share of queries that would be answered from the FAQ without calling
+a model (and the share that would be grounded with FAQ passages). Use it
+to tune FAQ_ANSWER_THRESHOLD / FAQ_CONTEXT_THRESHOLD / FAQ_MIN_MATCHED_TERMS
+before changing them.
+"""
+import argparse
+import time
+
+from analysis.dataload import load_records
+from services.faq import FaqIndex, is_direct_answer, load_faq_corpus
+from services.store import FEEDBACK_FILE
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--answer-threshold", type=float, default=0.45)
+    parser.add_argument("--context-threshold", type=float, default=0.25)
+    parser.add_argument("--min-terms", type=int, default=2, help="query terms a direct answer must match")
+    parser.add_argument("--repeat", type=int, default=5, help="index builds to time")
+    parser.add_argument("--show", type=int, default=10, help="queries to print with their best match")
+    args = parser.parse_args()
+
+    corpus = load_faq_corpus()
+    builds = []
+    for _ in range(args.repeat):
+        started = time.perf_counter()
+        index = FaqIndex(corpus)
+        builds.append(time.perf_counter() - started)
+
+    queries = [r["user_query"] for r in load_records(FEEDBACK_FILE) if r.get("user_query")]
+    answered = grounded = 0
+    latencies = []
+    for n, query in enumerate(queries):
+        started = time.perf_counter()
+        hits = index.search(query)
+        latencies.append(time.perf_counter() - started)
+        best = hits[0]["confidence"] if hits else 0.0
+        direct = bool(hits) and is_direct_answer(hits[0], args.answer_threshold, args.min_terms)
+        answered += direct
+        grounded += not direct and best >= args.context_threshold
+        if n < args.show:
+            match = hits[0]["question"] if hits else "-"
+            print(f"{best:5.2f}  {query[:50]:50}  {match}")
+
+    latencies.sort()
+    total = max(len(queries), 1)
+    print()
+    print(f"FAQ entries:       {len(corpus)}")
+    print(f"Build time:        {min(builds) * 1000:8.2f} ms")
+    print(f"Queries replayed:  {len(queries)}")
+    if latencies:
+        print(f"Query latency:     p50 {latencies[len(latencies) // 2] * 1000:.3f} ms, "
+              f"max {latencies[-1] * 1000:.3f} ms")
+    print(f"Answered by FAQ:   {answered / total:.0%} ({answered}) - LLM calls avoided")
+    print(f"Grounded by FAQ:   {grounded / total:.0%} ({grounded})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""Benchmark speculative (assisted) decoding of Granite on CPU.
+
+Usage:
+    python -m scripts.bench_speculative --draft ibm-granite/granite-3.1-1b-a400m-instruct
+
+Prompts are the distinct citizen queries stored in data/feedback.json. For
+each prompt the script measures greedy tokens/second with and without the
+draft model and, when the two models share a vocabulary, the fraction of
+draft tokens that Granite accepts.
+
+No speed-up or acceptance figures have been recorded for this repository
+yet; speculative decoding stays off by default until this script has been
+run on the deployment host.
+"""
+import argparse
+import os
+import time
+from pathlib import Path
+
+import torch
+from dotenv import load_dotenv
+from transformers import AutoModelForCausalLM, AutoTokenizer
+
+from analysis.dataload import load_records
+
+load_dotenv()
+HF_TOKEN = os.getenv("HF_TOKEN")
+TARGET_MODEL_NAME = "ibm-granite/granite-3.3-2b-instruct"
+FEEDBACK_FILE = Path(__file__).resolve().parent.parent / "data" / "feedback.json"
+
+
+def load_prompts(limit):
+    data = load_records(FEEDBACK_FILE)
+    queries = list(dict.fromkeys(entry["user_query"] for entry in data if entry.get("user_query")))
+    return [f"<|user|>\n{q}\n<|assistant|>\n" for q in queries[:limit]]
+
+
+def load_model(name):
+    tokenizer = AutoTokenizer.from_pretrained(name, use_auth_token=HF_TOKEN)
+    model = AutoModelForCausalLM.from_pretrained(name, torch_dtype=torch.float32, use_auth_token=HF_TOKEN)
+    model.eval()
+    return tokenizer, model
+
+
+def timed_generate(model, tokenizer, prompt, max_new_tokens, **kwargs):
+    inputs = tokenizer(prompt, return_tensors="pt")
+    started = time.perf_counter()
+    with torch.no_grad():
+        outputs = model.generate(
+            **inputs,
+            max_new_tokens=max_new_tokens,
+            do_sample=False,
+            pad_token_id=tokenizer.eos_token_id,
+            **kwargs
+        )
+    elapsed = time.perf_counter() - started
+    return outputs.shape[1] - inputs["input_ids"].shape[1], elapsed
+
+
+def acceptance_rate(target, draft, tokenizer, prompt, max_new_tokens, k):
+    """Greedy draft-then-verify loop counting how many draft tokens survive."""
+    ids = tokenizer(prompt, return_tensors="pt")["input_ids"]
+    proposed = accepted = generated = 0
+    with torch.no_grad():
+        while generated < max_new_tokens:
+            draft_out = draft.generate(ids, max_new_tokens=k, do_sample=False, pad_token_id=tokenizer.eos_token_id)
+            candidates = draft_out[:, ids.shape[1]:]
+            logits = target(torch.cat([ids, candidates], dim=1)).logits[0]
+            start = ids.shape[1] - 1
+            verified = logits[start:start + candidates.shape[1]].argmax(-1)
+            n = int((verified == candidates[0]).int().cumprod(0).sum())
+            proposed += candidates.shape[1]
+            accepted += n
+            next_token = logits[start + n].argmax().view(1, 1)
+            ids = torch.cat([ids, candidates[:, :n], next_token], dim=1)
+            generated += n + 1
+            if next_token.item() == tokenizer.eos_token_id:
+                break
+    return accepted, proposed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--draft", required=True, help="Hugging Face id of the draft model")
+    parser.add_argument("--prompts", type=int, default=10, help="number of stored queries to use")
+    parser.add_argument("--max-new-tokens", type=int, default=100)
+    parser.add_argument("--num-assistant-tokens", type=int, default=5)
+    args = parser.parse_args()
+
+    torch.set_num_threads(os.cpu_count() or 1)
+    prompts = load_prompts(args.prompts)
+    tokenizer, target = load_model(TARGET_MODEL_NAME)
+    draft_tokenizer, draft = load_model(args.draft)
+    draft.generation_config.num_assistant_tokens = args.num_assistant_tokens
+    shares_vocab = draft_tokenizer.get_vocab() == tokenizer.get_vocab()
+    assisted_kwargs = {"assistant_model": draft}
+    if not shares_vocab:
+        assisted_kwargs.update(tokenizer=tokenizer, assistant_tokenizer=draft_tokenizer)
+
+    # Warm up both paths so one-off allocation cost is not attributed to either.
+    timed_generate(target, tokenizer, prompts[0], 8)
+    timed_generate(target, tokenizer, prompts[0], 8, **assisted_kwargs)
+
+    totals = {"baseline": [0, 0.0], "assisted": [0, 0.0]}
+    accepted = proposed = 0
+    for prompt in prompts:
+        for mode, kwargs in (("baseline", {}), ("assisted", assisted_kwargs)):
+            tokens, elapsed = timed_generate(target, tokenizer, prompt, args.max_new_tokens, **kwargs)
+            totals[mode][0] += tokens
+            totals[mode][1] += elapsed
+        if shares_vocab:
+            a, p = acceptance_rate(target, draft, tokenizer, prompt, args.max_new_tokens, args.num_assistant_tokens)
+            accepted += a
+            proposed += p
+
+    baseline_tps = totals["baseline"][0] / totals["baseline"][1]
+    assisted_tps = totals["assisted"][0] / totals["assisted"][1]
+    print(f"Prompts:            {len(prompts)}")
+    print(f"Baseline:           {baseline_tps:.2f} tokens/s")
+    print(f"Assisted:           {assisted_tps:.2f} tokens/s")
+    print(f"Speed-up:           {assisted_tps / baseline_tps:.2f}x")
+    if shares_vocab:
+        print(f"Acceptance rate:    {accepted / max(proposed, 1):.1%} ({accepted}/{proposed} draft tokens)")
+    else:
+        print("Acceptance rate:    n/a (draft uses a different tokenizer)")
+
+
+if __name__ == "__main__":
+    main()
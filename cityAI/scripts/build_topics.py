@@ -0,0 +1,56 @@
+"""Rebuild the complaint topic model by replaying stored interactions.
+
+Usage:
+    python -m scripts.build_topics [--topics 12]
+
+Interactions are fed to the model in mini-batches, and the model's own
+state is bounded by its size rather than the history length. The history
+file itself is still read whole, but in its stored form: compressed text is
+decoded one batch at a time and replies are never decoded. Run from the
+cityAI directory while the API is stopped, since the API checkpoints the
+same state file.
+"""
+import argparse
+import time
+
+from analysis.dataload import load_records
+from analysis.topics import STATE_FILE, StreamingTopicModel
+from services.store import InteractionStore
+from services.textcodec import TextCodec
+
+BATCH_SIZE = 256
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--topics", type=int, default=12, help="number of clusters")
+    args = parser.parse_args()
+
+    model = StreamingTopicModel(n_topics=args.topics)
+    store = InteractionStore()
+    with store.locked():
+        records = load_records(store.path, decode=False)
+    codec = TextCodec()
+
+    started = time.perf_counter()
+    for start in range(0, len(records), BATCH_SIZE):
+        batch = [r for r in records[start:start + BATCH_SIZE] if r.get("user_query")]
+        by_day = {}
+        for record in batch:
+            by_day.setdefault(str(record.get("timestamp", ""))[:10] or None, []).append(record)
+        for day, day_records in sorted(by_day.items(), key=lambda item: item[0] or ""):
+            model.update(
+                [codec.decode(r["user_query"]) for r in day_records],
+                [r.get("sentiment", "") for r in day_records],
+                day=day,
+            )
+    model.save(STATE_FILE)
+    elapsed = time.perf_counter() - started
+
+    print(f"Clustered {len(records)} interactions into {args.topics} topics in {elapsed:.2f}s")
+    for topic in model.summary():
+        print(f"  #{topic['topic']:<3} {topic['size']:>6}  neg {topic['negative_share']:.0%}  {', '.join(topic['terms'])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Re-encode the interaction history with zstd-compressed text fields.
+
+Usage:
+    python -m scripts.compact_store [--dict-size 16384] [--level 9]
+    python -m scripts.compact_store --decompress
+
+Trains a zstd dictionary on the stored queries and replies (saved under
+data/zdict/), rewrites feedback.json under the store lock with the text
+fields compressed, and reports file size and read throughput before and
+after. Set STORE_COMPRESSION=zstd for the API so new interactions are
+written compressed too. ``--decompress`` rewrites the history as plain,
+indented JSON again.
+
+Compressed records can only be decoded with the dictionary they were
+written with, so data/zdict/*.zdict must travel with feedback.json: commit
+the dictionaries together with a compacted history, and never delete one
+while records written with it remain.
+
+Needs the optional zstandard package (pip install zstandard).
+"""
+import argparse
+import os
+import time
+
+from analysis.dataload import load_interactions, load_records
+from services.store import FEEDBACK_FILE, InteractionStore
+from services.textcodec import TEXT_FIELDS, TextCodec, train_dictionary, zstandard
+
+
+def best_of(repeat, fn):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def report(label, repeat):
+    size = os.path.getsize(FEEDBACK_FILE)
+    rows = len(load_records(FEEDBACK_FILE, decode=False))
+    full = best_of(repeat, lambda: load_records(FEEDBACK_FILE))
+    compact = best_of(repeat, lambda: load_interactions(FEEDBACK_FILE))
+    print(f"{label:8} {size / 1024:10.1f} KB   "
+          f"full read {rows / full:10.0f} rec/s   "
+          f"labels only {rows / compact:10.0f} rec/s")
+    return size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dict-size", type=int, default=16 * 1024, help="dictionary size in bytes")
+    parser.add_argument("--level", type=int, default=9, help="zstd compression level")
+    parser.add_argument("--decompress", action="store_true", help="rewrite the history as plain JSON")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    before = report("Before", args.repeat)
+    if args.decompress:
+        InteractionStore(codec=TextCodec()).rewrite(lambda records: records)
+        report("After", args.repeat)
+        return
+    if zstandard is None:
+        raise SystemExit("Compression needs the zstandard package: pip install zstandard")
+
+    records = load_records(FEEDBACK_FILE)
+    samples = [r[field] for r in records for field in TEXT_FIELDS if isinstance(r.get(field), str) and r[field]]
+    text_bytes = sum(len(s.encode("utf-8")) for s in samples)
+    try:
+        dict_path = train_dictionary(samples, size=args.dict_size)
+    except zstandard.ZstdError as e:
+        raise SystemExit(f"Could not train a dictionary on {len(samples)} texts ({e}); "
+                         f"try a smaller --dict-size once more history has accumulated")
+
+    plain = zstandard.ZstdCompressor(level=args.level)
+    trained = zstandard.ZstdCompressor(
+        level=args.level, dict_data=zstandard.ZstdCompressionDict(dict_path.read_bytes())
+    )
+    without_dict = sum(len(plain.compress(s.encode("utf-8"))) for s in samples)
+    with_dict = sum(len(trained.compress(s.encode("utf-8"))) for s in samples)
+
+    InteractionStore(codec=TextCodec(dict_path, level=args.level)).rewrite(lambda records: records)
+    after = report("After", args.repeat)
+
+    print()
+    print(f"Dictionary:        {dict_path.name} ({dict_path.stat().st_size / 1024:.1f} KB)")
+    print(f"Text fields:       {text_bytes / 1024:10.1f} KB raw")
+    print(f"  zstd, no dict:   {without_dict / 1024:10.1f} KB")
+    print(f"  zstd, dict:      {with_dict / 1024:10.1f} KB")
+    print(f"History file:      {1 - after / before:.0%} smaller")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,17 @@
 import torch
-from transformers import AutoModelForCausalLM, AutoTokenizer
 import os
 from dotenv import load_dotenv
 
+from services.registry import DEFAULT_MODEL, ModelRegistry
+
 load_dotenv()
 HF_TOKEN = os.getenv("HF_TOKEN")
-MODEL_NAME = "ibm-granite/granite-3.3-2b-instruct"
+MODEL_NAME = os.getenv("IBM_MODEL", DEFAULT_MODEL)
 
 # Load Model and Tokenizer
-tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME, use_auth_token=HF_TOKEN)
-model = AutoModelForCausalLM.from_pretrained(
-    MODEL_NAME,
-    torch_dtype=torch.float16,
-    device_map="auto",
-    use_auth_token=HF_TOKEN
-)
+device = "cuda" if torch.cuda.is_available() else "cpu"
+registry = ModelRegistry(device, memory_budget=float("inf"), token=HF_TOKEN)
+tokenizer, model = registry.get(MODEL_NAME)
 
 # Test
 user_query = "Where can I get a birth certificate in Chennai?"
@@ -0,0 +1,144 @@
+import heapq
+import itertools
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request is shed instead of being queued."""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """Bounded priority queue in front of the inference backends.
+
+    At most ``max_concurrency`` requests run at once. Others wait in a queue
+    ordered by priority (lower runs first), then by arrival. A request is
+    rejected up front when the queue is full or when its projected wait
+    exceeds ``max_wait`` or its own deadline.
+    """
+
+    def __init__(self, max_concurrency=1, max_queue=16, max_wait=20.0,
+                 initial_service_time=5.0, ewma_alpha=0.2, sample_size=512):
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.ewma_alpha = ewma_alpha
+        self.service_time = initial_service_time
+
+        self._cond = threading.Condition()
+        self._waiters = []
+        self._seq = itertools.count()
+        self._inflight = 0
+
+        self._wait_samples = deque(maxlen=sample_size)
+        self._admitted = 0
+        self._rejected = 0
+        self._expired = 0
+
+    # ----------------------------------------------
+    # Projection
+    # ----------------------------------------------
+    def _projected_wait(self, ahead: int) -> float:
+        """Estimated queueing delay for a request with ``ahead`` waiters before it."""
+        if self._inflight + ahead < self.max_concurrency:
+            return 0.0
+        rounds = (ahead // self.max_concurrency) + 1
+        return rounds * self.service_time
+
+    def projected_wait(self, priority: int = 0) -> float:
+        with self._cond:
+            ahead = sum(1 for p, _ in self._waiters if p <= priority)
+            return self._projected_wait(ahead)
+
+    # ----------------------------------------------
+    # Admission
+    # ----------------------------------------------
+    @contextmanager
+    def admit(self, priority: int = 0, deadline: float = None):
+        """Hold a worker slot for the duration of the ``with`` block.
+
+        ``deadline`` is an absolute ``time.monotonic()`` value; a request that
+        cannot start before it is rejected rather than left to time out.
+        The block receives the seconds the request spent queued.
+        """
+        enqueued = time.monotonic()
+        with self._cond:
+            ahead = sum(1 for p, _ in self._waiters if p <= priority)
+            wait = self._projected_wait(ahead)
+            budget = self.max_wait
+            if deadline is not None:
+                budget = min(budget, deadline - enqueued)
+            if len(self._waiters) >= self.max_queue:
+                self._reject("queue full", wait)
+            if wait > budget:
+                self._reject("projected wait exceeds deadline", wait)
+
+            entry = (priority, next(self._seq))
+            heapq.heappush(self._waiters, entry)
+            try:
+                while self._inflight >= self.max_concurrency or self._waiters[0] != entry:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        self._expired += 1
+                        self._reject("deadline expired in queue", self._projected_wait(len(self._waiters)))
+                    self._cond.wait(remaining)
+            except AdmissionRejected:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+                self._cond.notify_all()
+                raise
+
+            heapq.heappop(self._waiters)
+            self._inflight += 1
+            self._admitted += 1
+            started = time.monotonic()
+            self._wait_samples.append(started - enqueued)
+            self._cond.notify_all()
+
+        try:
+            yield started - enqueued
+        finally:
+            elapsed = time.monotonic() - started
+            with self._cond:
+                self._inflight -= 1
+                self.service_time += self.ewma_alpha * (elapsed - self.service_time)
+                self._cond.notify_all()
+
+    def _reject(self, reason, wait):
+        self._rejected += 1
+        raise AdmissionRejected(reason, retry_after=max(1, math.ceil(wait)))
+
+    # ----------------------------------------------
+    # Metrics
+    # ----------------------------------------------
+    def metrics(self) -> dict:
+        with self._cond:
+            samples = sorted(self._wait_samples)
+            return {
+                "inflight": self._inflight,
+                "queued": len(self._waiters),
+                "admitted": self._admitted,
+                "rejected": self._rejected,
+                "expired": self._expired,
+                "service_time_ewma_s": round(self.service_time, 3),
+                "queue_wait_s": {
+                    "p50": _percentile(samples, 0.50),
+                    "p95": _percentile(samples, 0.95),
+                    "max": round(samples[-1], 3) if samples else 0.0,
+                },
+            }
+
+
+def _percentile(sorted_samples, q):
+    if not sorted_samples:
+        return 0.0
+    index = min(len(sorted_samples) - 1, int(q * len(sorted_samples)))
+    return round(sorted_samples[index], 3)
@@ -0,0 +1,154 @@
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpen(Exception):
+    """Raised instead of calling a backend whose breaker is open."""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"{name} circuit is open")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Fail fast on a backend that keeps erroring or answering slowly.
+
+    Outcomes of the last ``window_size`` calls are kept; a call slower than
+    ``slow_call_seconds`` counts as a failure even if it succeeded. Once at
+    least ``min_calls`` are recorded and the failure share reaches
+    ``failure_threshold`` the breaker opens and rejects every call for
+    ``open_seconds``. It then goes half-open and lets ``half_open_probes``
+    calls through: if they all succeed it closes, any failure reopens it.
+    """
+
+    def __init__(self, name, failure_threshold=0.5, window_size=20, min_calls=5,
+                 slow_call_seconds=5.0, open_seconds=30.0, half_open_probes=1, history=50):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.min_calls = min_calls
+        self.slow_call_seconds = slow_call_seconds
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+
+        self.state = CLOSED
+        self._outcomes = deque(maxlen=window_size)  # True for a failed or slow call
+        self._opened_at = 0.0
+        self._probes_inflight = 0
+        self._probes_passed = 0
+        self._lock = threading.Lock()
+
+        self.calls = 0
+        self.failures = 0
+        self.slow_calls = 0
+        self.rejected = 0
+        self.transitions = {}
+        self._history = deque(maxlen=history)
+
+    # ----------------------------------------------
+    # State machine
+    # ----------------------------------------------
+    def _transition(self, state):
+        key = f"{self.state}->{state}"
+        self.transitions[key] = self.transitions.get(key, 0) + 1
+        self._history.append({"from": self.state, "to": state, "at": time.time()})
+        logger.warning(f"Circuit breaker {self.name}: {self.state} -> {state}")
+        self.state = state
+        if state == OPEN:
+            self._opened_at = time.monotonic()
+        if state == HALF_OPEN:
+            self._probes_inflight = self._probes_passed = 0
+        if state == CLOSED:
+            self._outcomes.clear()
+
+    def _retry_after(self) -> float:
+        return max(0.0, self.open_seconds - (time.monotonic() - self._opened_at))
+
+    def available(self) -> bool:
+        """Whether a call would currently be let through (without reserving it)."""
+        with self._lock:
+            if self.state == OPEN:
+                return self._retry_after() == 0.0
+            if self.state == HALF_OPEN:
+                return self._probes_inflight < self.half_open_probes
+            return True
+
+    def _acquire(self):
+        with self._lock:
+            if self.state == OPEN and self._retry_after() == 0.0:
+                self._transition(HALF_OPEN)
+            if self.state == OPEN or (
+                self.state == HALF_OPEN and self._probes_inflight >= self.half_open_probes
+            ):
+                self.rejected += 1
+                raise CircuitOpen(self.name, self._retry_after())
+            if self.state == HALF_OPEN:
+                self._probes_inflight += 1
+            return self.state
+
+    def record(self, state, latency, ok):
+        """Account a finished call started while the breaker was in ``state``."""
+        slow = ok and latency > self.slow_call_seconds
+        failed = not ok or slow
+        with self._lock:
+            self.calls += 1
+            self.failures += not ok
+            self.slow_calls += slow
+            if state == HALF_OPEN:
+                self._probes_inflight -= 1
+                if self.state != HALF_OPEN:
+                    return  # another probe already decided
+                if failed:
+                    self._transition(OPEN)
+                else:
+                    self._probes_passed += 1
+                    if self._probes_passed >= self.half_open_probes:
+                        self._transition(CLOSED)
+                return
+            if self.state != CLOSED:
+                return
+            self._outcomes.append(failed)
+            if (
+                len(self._outcomes) >= self.min_calls
+                and sum(self._outcomes) / len(self._outcomes) >= self.failure_threshold
+            ):
+                self._transition(OPEN)
+
+    @contextmanager
+    def guard(self):
+        """Run one call through the breaker; raises CircuitOpen when rejected.
+
+        Exceptions raised inside the block count as failures.
+        """
+        state = self._acquire()
+        started = time.monotonic()
+        ok = False
+        try:
+            yield
+            ok = True
+        finally:
+            self.record(state, time.monotonic() - started, ok)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            failing = sum(self._outcomes)
+            return {
+                "state": self.state,
+                "retry_after_s": round(self._retry_after(), 1) if self.state == OPEN else 0.0,
+                "window_failure_rate": round(failing / len(self._outcomes), 3) if self._outcomes else 0.0,
+                "calls": self.calls,
+                "failures": self.failures,
+                "slow_calls": self.slow_calls,
+                "rejected": self.rejected,
+                "transitions": dict(self.transitions),
+                "recent_transitions": list(self._history),
+            }
@@ -0,0 +1,48 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+def normalize_query(query: str) -> str:
+    """Case- and whitespace-insensitive cache key for a citizen query."""
+    return " ".join(query.lower().split())
+
+
+class ResponseCache:
+    """Small thread-safe LRU of recent replies with a time-to-live."""
+
+    def __init__(self, max_entries=512, ttl=3600.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, query: str):
+        key = normalize_query(query)
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None or time.monotonic() - item[1] > self.ttl:
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def put(self, query: str, reply: str):
+        key = normalize_query(query)
+        with self._lock:
+            self._entries[key] = (reply, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
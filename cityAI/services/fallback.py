@@ -0,0 +1,90 @@
+import math
+import threading
+from collections import Counter, defaultdict
+
+from analysis.text_features import feature_index, ngrams
+from services.cache import normalize_query
+
+
+def sparse_vector(text: str) -> dict:
+    """L2-normalised hashed n-gram counts as ``{feature: weight}``."""
+    counts = Counter(feature_index(term) for term in ngrams(text))
+    norm = math.sqrt(sum(c * c for c in counts.values()))
+    return {f: c / norm for f, c in counts.items()} if norm else {}
+
+
+class AnswerIndex:
+    """Past answers searchable by query similarity, for degraded-mode replies.
+
+    Keeps the latest answer per distinct (normalised) query in an inverted
+    index over the same hashed n-gram features as the topic and category
+    models, so a lookup only touches answers that share a term with the
+    new query. Replies starting with one of ``skip_prefixes`` (error notices,
+    earlier degraded answers) are never indexed, and answers rated negative
+    can be dropped with ``discard``.
+    """
+
+    def __init__(self, min_similarity=0.5, skip_prefixes=()):
+        self.min_similarity = min_similarity
+        self.skip_prefixes = tuple(skip_prefixes)
+        self._docs = {}  # normalised query -> (interaction id, query, reply, vector)
+        self._postings = defaultdict(dict)  # feature -> {normalised query: weight}
+        self._by_id = {}
+        self._lock = threading.Lock()
+        self.served = 0
+        self.misses = 0
+
+    def _remove(self, key):
+        interaction_id, _, _, vector = self._docs.pop(key)
+        self._by_id.pop(interaction_id, None)
+        for feature in vector:
+            postings = self._postings[feature]
+            postings.pop(key, None)
+            if not postings:
+                del self._postings[feature]
+
+    def add(self, records, ratings=None):
+        """Index interaction records, skipping those rated negative in ``ratings``."""
+        ratings = ratings or {}
+        with self._lock:
+            for record in records:
+                query, reply = record.get("user_query") or "", record.get("reply") or ""
+                if not reply or reply.startswith(self.skip_prefixes):
+                    continue
+                if ratings.get(record.get("id")) == "NEGATIVE":
+                    continue
+                vector = sparse_vector(query)
+                if not vector:
+                    continue
+                key = normalize_query(query)
+                if key in self._docs:
+                    self._remove(key)
+                self._docs[key] = (record.get("id"), query, reply, vector)
+                self._by_id[record.get("id")] = key
+                for feature, weight in vector.items():
+                    self._postings[feature][key] = weight
+
+    def discard(self, interaction_id):
+        with self._lock:
+            key = self._by_id.get(interaction_id)
+            if key is not None:
+                self._remove(key)
+
+    def best(self, query: str):
+        """``(past query, reply, similarity)`` of the closest answer, or None."""
+        scores = defaultdict(float)
+        with self._lock:
+            for feature, weight in sparse_vector(query).items():
+                for key, doc_weight in self._postings.get(feature, {}).items():
+                    scores[key] += weight * doc_weight
+            key = max(scores, key=scores.get, default=None)
+            if key is None or scores[key] < self.min_similarity:
+                self.misses += 1
+                return None
+            self.served += 1
+            _, past_query, reply, _ = self._docs[key]
+            return past_query, reply, scores[key]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"answers": len(self._docs), "served": self.served, "misses": self.misses}
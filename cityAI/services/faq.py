@@ -0,0 +1,143 @@
+import json
+import math
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from pathlib import Path
+
+from analysis.text_features import tokenize
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+FAQ_DIR = DATA_DIR / "faq"
+
+
+def load_faq_corpus(faq_dir=FAQ_DIR) -> list:
+    """All ``{"question", "answer", "category"}`` entries from ``faq_dir/*.json``."""
+    entries = []
+    for path in sorted(Path(faq_dir).glob("*.json")):
+        with open(path, "r", encoding="utf-8") as f:
+            for entry in json.load(f):
+                if entry.get("question") and entry.get("answer"):
+                    entries.append({**entry, "source": path.name})
+    return entries
+
+
+def is_direct_answer(hit, threshold, min_terms=2) -> bool:
+    """Whether ``hit`` is confident enough to be sent without calling a model."""
+    return hit["confidence"] >= threshold and hit["matched_terms"] >= min_terms
+
+
+class FaqIndex:
+    """Okapi BM25 over curated FAQ entries, with a normalised confidence.
+
+    Each entry is indexed on its question (counted ``question_weight``
+    times) plus its answer. A hit's confidence is its BM25 score divided by
+    the best score any document could get for the query, i.e. every query
+    term matched with saturated term frequency, scaled by the square root of
+    the share of the entry's question terms that the query contains. It lies
+    in [0, 1) and is comparable across queries. Query terms the corpus has
+    never seen count at the highest IDF, which keeps off-topic queries from
+    scoring high; the coverage factor keeps one-word queries ("tax",
+    "water") from matching a specific question confidently. Hits also carry
+    ``matched_terms``, the number of distinct query terms found in the entry.
+    """
+
+    def __init__(self, entries, k1=1.5, b=0.75, question_weight=2, sample_size=512):
+        self.k1 = k1
+        self.b = b
+        started = time.perf_counter()
+        self.entries = list(entries)
+        self._postings = defaultdict(list)  # term -> [(doc, term frequency)]
+        self._lengths = []
+        self._question_terms = []
+        for doc, entry in enumerate(self.entries):
+            question = tokenize(entry["question"])
+            self._question_terms.append(set(question))
+            terms = question * question_weight + tokenize(entry["answer"])
+            self._lengths.append(len(terms))
+            for term, tf in Counter(terms).items():
+                self._postings[term].append((doc, tf))
+        n_docs = len(self.entries)
+        self._avg_length = sum(self._lengths) / n_docs if n_docs else 0.0
+        self._idf = {
+            term: math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+            for term, postings in self._postings.items()
+        }
+        self._max_idf = math.log(1 + (n_docs + 0.5) / 0.5)
+        self.build_seconds = time.perf_counter() - started
+
+        self._lock = threading.Lock()
+        self._latency_samples = deque(maxlen=sample_size)
+        self.lookups = 0
+        self.answered = 0
+        self.grounded = 0
+
+    @classmethod
+    def from_dir(cls, faq_dir=FAQ_DIR, **kwargs):
+        return cls(load_faq_corpus(faq_dir), **kwargs)
+
+    def search(self, query: str, k=3) -> list:
+        """Top ``k`` entries as ``{**entry, "score", "confidence"}``, best first."""
+        started = time.perf_counter()
+        terms = set(tokenize(query))
+        scores = defaultdict(float)
+        matched = Counter()
+        for term in terms:
+            idf = self._idf.get(term)
+            if idf is None:
+                continue
+            for doc, tf in self._postings[term]:
+                norm = self.k1 * (1 - self.b + self.b * self._lengths[doc] / self._avg_length)
+                scores[doc] += idf * tf * (self.k1 + 1) / (tf + norm)
+                matched[doc] += 1
+        ceiling = sum(self._idf.get(term, self._max_idf) for term in terms) * (self.k1 + 1)
+        confidence = {doc: score / ceiling * math.sqrt(self._coverage(doc, terms)) for doc, score in scores.items()}
+        ranked = sorted(confidence, key=lambda doc: (confidence[doc], scores[doc]), reverse=True)[:k]
+        hits = [
+            {
+                **self.entries[doc],
+                "score": round(scores[doc], 3),
+                "confidence": round(confidence[doc], 3),
+                "matched_terms": matched[doc],
+            }
+            for doc in ranked
+        ]
+        with self._lock:
+            self.lookups += 1
+            self._latency_samples.append(time.perf_counter() - started)
+        return hits
+
+    def _coverage(self, doc, query_terms) -> float:
+        """Share of entry ``doc``'s question terms that appear in the query."""
+        question = self._question_terms[doc]
+        return len(question & query_terms) / len(question) if question else 0.0
+
+    def record(self, answered: bool, grounded: bool):
+        """Count how a lookup was used: answered directly or as LLM context."""
+        with self._lock:
+            self.answered += answered
+            self.grounded += grounded
+
+    def stats(self) -> dict:
+        with self._lock:
+            samples = sorted(self._latency_samples)
+            return {
+                "entries": len(self.entries),
+                "build_ms": round(self.build_seconds * 1000, 2),
+                "lookups": self.lookups,
+                "answered": self.answered,
+                "grounded": self.grounded,
+                "llm_calls_avoided": round(self.answered / self.lookups, 3) if self.lookups else 0.0,
+                "query_latency_ms": {
+                    "p50": _percentile_ms(samples, 0.50),
+                    "p95": _percentile_ms(samples, 0.95),
+                    "max": round(samples[-1] * 1000, 3) if samples else 0.0,
+                },
+            }
+
+
+def _percentile_ms(sorted_samples, q):
+    if not sorted_samples:
+        return 0.0
+    index = min(len(sorted_samples) - 1, int(q * len(sorted_samples)))
+    return round(sorted_samples[index] * 1000, 3)
@@ -0,0 +1,199 @@
+import gc
+import logging
+import threading
+from collections import OrderedDict
+
+import torch
+from huggingface_hub import get_safetensors_metadata
+from transformers import AutoModelForCausalLM, AutoTokenizer
+
+logger = logging.getLogger(__name__)
+
+# Display names used by the System Settings page -> Hugging Face model ids.
+MODEL_CATALOG = {
+    "IBM Granite Standard": "ibm-granite/granite-3.3-2b-instruct",
+    "IBM Granite Advanced": "ibm-granite/granite-3.3-8b-instruct",
+}
+DEFAULT_MODEL = "IBM Granite Standard"
+
+# "Response Detail Level" slider (1-5) -> max_new_tokens for generation.
+DETAIL_LEVEL_TOKENS = {1: 50, 2: 75, 3: 100, 4: 200, 5: 350}
+
+
+class ModelDoesNotFit(RuntimeError):
+    """Raised instead of loading a model that would exceed the memory budget."""
+
+
+def estimate_footprint(model_id, device, token=None):
+    """Bytes the model's weights will take once loaded, or None if unknown.
+
+    Reads the parameter count from the checkpoint's safetensors metadata
+    (no weights are downloaded) and sizes it for the dtype ``load_pretrained``
+    uses on ``device``.
+    """
+    try:
+        metadata = get_safetensors_metadata(model_id, token=token)
+    except Exception as e:  # offline, gated or not a safetensors checkpoint
+        logger.warning(f"Could not estimate the size of {model_id}: {e}")
+        return None
+    bytes_per_param = 2 if device == "cuda" else 4
+    return sum(metadata.parameter_count.values()) * bytes_per_param
+
+
+def load_pretrained(model_id, device, token=None):
+    tokenizer = AutoTokenizer.from_pretrained(model_id, use_auth_token=token)
+    model = AutoModelForCausalLM.from_pretrained(
+        model_id,
+        torch_dtype=torch.float16 if device == "cuda" else torch.float32,
+        device_map="auto",
+        use_auth_token=token
+    )
+    return tokenizer, model
+
+
+class ModelRegistry:
+    """Loads catalogue models on demand and keeps them resident under a memory budget.
+
+    Resident models are kept in LRU order. Before a model is loaded its size
+    is estimated and the least recently used models (never the active one)
+    are evicted to make room; if it still cannot fit, ``ModelDoesNotFit`` is
+    raised and nothing is loaded. The measured size is checked again after
+    loading, for models whose size could not be estimated. ``set_active``
+    loads the new model before switching, so requests keep being served by
+    the old model during a hot-swap; a background swap that fails is
+    logged and reported as ``load_error`` in ``status()``.
+    """
+
+    def __init__(self, device, memory_budget, catalog=MODEL_CATALOG, token=None, loader=load_pretrained,
+                 estimator=estimate_footprint):
+        self.device = device
+        self.memory_budget = memory_budget
+        self.catalog = dict(catalog)
+        self.token = token
+        self.loader = loader
+        self.estimator = estimator
+        self.active_name = None
+        self.loading = None
+        self.load_error = None
+        self._resident = OrderedDict()  # name -> (tokenizer, model, bytes)
+        self._lock = threading.RLock()
+        self._load_lock = threading.Lock()  # one load at a time, without blocking lookups
+
+    def _footprint(self, model) -> int:
+        return sum(p.numel() * p.element_size() for p in model.parameters())
+
+    def _release(self):
+        gc.collect()
+        if self.device == "cuda":
+            torch.cuda.empty_cache()
+
+    def _require_fit(self, name, needed):
+        """Raise ModelDoesNotFit unless ``needed`` bytes fit next to the active model."""
+        active = self._resident.get(self.active_name)
+        available = self.memory_budget - (active[2] if active else 0)
+        if needed > available:
+            raise ModelDoesNotFit(
+                f"{name} needs {needed / 1024 ** 3:.1f} GB but only {available / 1024 ** 3:.1f} GB "
+                f"of the {self.memory_budget / 1024 ** 3:.1f} GB model memory budget can be freed"
+            )
+
+    def _evict_for(self, name, needed):
+        """Evict least recently used models until ``needed`` bytes fit."""
+        self._require_fit(name, needed)
+        used = sum(size for _, _, size in self._resident.values())
+        evicted = False
+        for resident in list(self._resident):
+            if used + needed <= self.memory_budget:
+                break
+            if resident == self.active_name:
+                continue
+            _, _, size = self._resident.pop(resident)
+            used -= size
+            evicted = True
+        if evicted:
+            self._release()
+
+    def check_fits(self, name):
+        """Raise ModelDoesNotFit if ``name`` could not be loaded under the budget."""
+        with self._lock:
+            if name in self._resident:
+                return
+        needed = self.estimator(self.catalog[name], self.device, self.token)
+        if needed is not None:
+            with self._lock:
+                self._require_fit(name, needed)
+
+    def get(self, name):
+        """Return ``(tokenizer, model)`` for ``name``, loading it if needed."""
+        if name not in self.catalog:
+            raise KeyError(f"Unknown model: {name}")
+        with self._lock:
+            if name in self._resident:
+                self._resident.move_to_end(name)
+                tokenizer, model, _ = self._resident[name]
+                return tokenizer, model
+        with self._load_lock:
+            with self._lock:
+                if name in self._resident:  # loaded by another thread meanwhile
+                    tokenizer, model, _ = self._resident[name]
+                    return tokenizer, model
+                self.loading = name
+            try:
+                estimate = self.estimator(self.catalog[name], self.device, self.token)
+                if estimate is not None:
+                    with self._lock:  # make room before loading, so old and new never overlap
+                        self._evict_for(name, estimate)
+                tokenizer, model = self.loader(self.catalog[name], self.device, self.token)
+                size = self._footprint(model)
+                with self._lock:
+                    try:
+                        self._evict_for(name, size)
+                    except ModelDoesNotFit:
+                        del tokenizer, model
+                        self._release()
+                        raise
+                    self._resident[name] = (tokenizer, model, size)
+            finally:
+                self.loading = None
+            return tokenizer, model
+
+    def set_active(self, name):
+        """Make ``name`` active once it is loaded; blocks for the load."""
+        self.get(name)
+        with self._lock:
+            self.active_name = name
+            self.load_error = None
+
+    def _swap(self, name):
+        try:
+            self.set_active(name)
+        except Exception as e:
+            logger.exception(f"Could not switch to {name}")
+            with self._lock:
+                self.load_error = {"model": name, "error": str(e)}
+
+    def set_active_async(self, name) -> threading.Thread:
+        """Hot-swap in the background; the current model serves until the swap."""
+        if name not in self.catalog:
+            raise KeyError(f"Unknown model: {name}")
+        thread = threading.Thread(target=self._swap, args=(name,), daemon=True)
+        thread.start()
+        return thread
+
+    def active(self):
+        """Return ``(name, tokenizer, model)`` of the active model."""
+        with self._lock:
+            name = self.active_name
+        tokenizer, model = self.get(name)
+        return name, tokenizer, model
+
+    def status(self) -> dict:
+        with self._lock:
+            return {
+                "active": self.active_name,
+                "loading": self.loading,
+                "load_error": self.load_error,
+                "available": list(self.catalog),
+                "resident": {name: size for name, (_, _, size) in self._resident.items()},
+                "memory_budget": self.memory_budget,
+            }
@@ -0,0 +1,150 @@
+import threading
+import time
+from contextlib import contextmanager
+
+
+class BackendStats:
+    """Rolling health of one backend: in-flight count, latency and error EWMAs.
+
+    ``initial_latency`` is only a prior; the first measured call replaces it.
+    """
+
+    def __init__(self, name, cost_weight=0.0, initial_latency=1.0):
+        self.name = name
+        self.cost_weight = cost_weight
+        self.inflight = 0
+        self.latency = initial_latency
+        self.error_rate = 0.0
+        self.calls = 0
+        self.errors = 0
+        self.samples = 0  # successful calls whose latency was measured
+        self.last_used = time.monotonic()
+
+    def snapshot(self) -> dict:
+        return {
+            "inflight": self.inflight,
+            "latency_ewma_s": round(self.latency, 3),
+            "error_rate": round(self.error_rate, 3),
+            "calls": self.calls,
+            "errors": self.errors,
+            "cost_weight": self.cost_weight,
+        }
+
+
+class LatencyRouter:
+    """Send each request to the backend expected to answer fastest.
+
+    The expected cost of a backend is its latency EWMA scaled by the work
+    already queued on it, inflated by its recent error rate, plus a fixed
+    per-backend cost weight. To avoid flapping, the router only leaves its
+    current backend when another one is cheaper by more than ``hysteresis``.
+
+    A backend's estimates only change when it is called, so a backend idle for ``probe_interval`` seconds is sent one request as a
+    probe; otherwise a backend that started with a pessimistic prior, or had
+    a bad spell, would never be measured again. ``probe_interval=0``
+    disables probing.
+    """
+
+    def __init__(self, backends, alpha=0.2, hysteresis=0.25, error_penalty=10.0, probe_interval=60.0):
+        self.stats = {b.name: b for b in backends}
+        self.alpha = alpha
+        self.hysteresis = hysteresis
+        self.error_penalty = error_penalty
+        self.probe_interval = probe_interval
+        self.current = None
+        self.switches = 0
+        self.probes = 0
+        self._lock = threading.Lock()
+
+    def expected_cost(self, name) -> float:
+        s = self.stats[name]
+        queued = s.latency * (1 + s.inflight)
+        return queued * (1 + self.error_penalty * s.error_rate) + s.cost_weight
+
+    def choose(self, candidates) -> str:
+        if not candidates:
+            raise ValueError("No backend available")
+        with self._lock:
+            costs = {name: self.expected_cost(name) for name in candidates}
+            best = min(costs, key=costs.get)
+            current = self.current
+            choice = best
+            if (
+                current in costs
+                and current != best
+                and costs[current] <= costs[best] * (1 + self.hysteresis)
+            ):
+                choice = current
+            probe = self._probe_candidate(candidates, choice)
+            if probe is not None:
+                return probe
+            if choice != current:
+                self.current = choice
+                self.switches += 1
+            return choice
+
+    def _probe_candidate(self, candidates, choice):
+        """An idle backend overdue for a measurement, marked as probed."""
+        if self.probe_interval <= 0:
+            return None
+        now = time.monotonic()
+        for name in candidates:
+            s = self.stats[name]
+            if name != choice and s.inflight == 0 and now - s.last_used >= self.probe_interval:
+                s.last_used = now
+                self.probes += 1
+                return name
+        return None
+
+    @contextmanager
+    def track(self, name, measure=True):
+        """Account one call on ``name``; exceptions count as errors.
+
+        With ``measure=False`` the call still shows as in flight and counts
+        towards the error rate, but its duration is kept out of the latency
+        estimate (e.g. a padded batch, which is not comparable to one query).
+        """
+        s = self.stats[name]
+        with self._lock:
+            s.inflight += 1
+        started = time.monotonic()
+        ok = False
+        try:
+            yield
+            ok = True
+        finally:
+            with self._lock:
+                s.inflight -= 1
+            self.record(name, time.monotonic() - started if measure else None, ok)
+
+    def record(self, name, latency, ok):
+        """Account a finished call; ``latency=None`` leaves the latency estimate alone."""
+        s = self.stats[name]
+        with self._lock:
+            s.calls += 1
+            s.last_used = time.monotonic()
+            if not ok:
+                s.errors += 1
+            elif latency is not None:
+                # The first measurement replaces the configured prior outright.
+                s.latency = latency if not s.samples else s.latency + self.alpha * (latency - s.latency)
+                s.samples += 1
+            s.error_rate += self.alpha * ((0.0 if ok else 1.0) - s.error_rate)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "current": self.current,
+                "switches": self.switches,
+                "probes": self.probes,
+                "backends": {name: s.snapshot() for name, s in self.stats.items()},
+            }
+
+
+def parse_cost_weights(spec: str) -> dict:
+    """Parse ``"local=0,groq=0.5"`` into ``{"local": 0.0, "groq": 0.5}``."""
+    weights = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, value = item.partition("=")
+        weights[name.strip()] = float(value)
+    return weights
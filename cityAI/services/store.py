@@ -0,0 +1,216 @@
+import json
+import os
+import tempfile
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+from services.textcodec import default_codec
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to in-process locking only
+    fcntl = None
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+FEEDBACK_FILE = DATA_DIR / "feedback.json"
+RATINGS_FILE = DATA_DIR / "ratings.jsonl"
+VALID_RATINGS = ("POSITIVE", "NEGATIVE")
+
+
+class InteractionStore:
+    """Interaction history in feedback.json plus an append-only ratings log.
+
+    All writers (the API process and any scripts) serialise on a sidecar lock
+    file, and feedback.json is replaced atomically so readers never see a
+    half-written array. Ratings are appended one JSON line at a time, so
+    rating an answer costs the same however long the history is.
+
+    The parsed history is cached in memory and only re-read when the file
+    changes on disk, so the change feed (``since``) costs time proportional
+    to the new records rather than the whole history.
+
+    With a compressing ``codec`` (the default when STORE_COMPRESSION=zstd)
+    query/reply text is written zstd-compressed and the file is no longer
+    indented. Reads always decode, so callers only ever see plain text,
+    whatever mix of plain and compressed records is on disk.
+    """
+
+    def __init__(self, path=FEEDBACK_FILE, ratings_path=RATINGS_FILE, codec=None):
+        self.path = Path(path)
+        self.ratings_path = Path(ratings_path)
+        self.lock_path = self.path.with_suffix(".lock")
+        self.codec = codec or default_codec()
+        self._thread_lock = threading.RLock()
+        self._lock_depth = 0
+        self._raw = []  # records as stored on disk
+        self._cache = []  # the same records, decoded
+        self._ids = set()
+        self._cache_stamp = None
+
+    @contextmanager
+    def locked(self):
+        """Exclusive access to the store; re-entrant within one thread."""
+        with self._thread_lock:
+            if self._lock_depth:
+                self._lock_depth += 1
+                try:
+                    yield
+                finally:
+                    self._lock_depth -= 1
+                return
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.lock_path, "a") as lock_file:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                self._lock_depth = 1
+                try:
+                    yield
+                finally:
+                    self._lock_depth = 0
+                    if fcntl is not None:
+                        fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    # ----------------------------------------------
+    # Interactions
+    # ----------------------------------------------
+    def _read(self) -> list:
+        if not self.path.exists() or self.path.stat().st_size == 0:
+            return []
+        with open(self.path, "r") as f:
+            return json.load(f)  # a corrupt file raises instead of being reset
+
+    def _stamp(self):
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _records(self) -> list:
+        """Cached history, refreshed if another process rewrote the file."""
+        stamp = self._stamp()
+        if stamp != self._cache_stamp:
+            self._raw = self._read()
+            self._cache = self.codec.decode_records(self._raw)
+            self._ids = {record.get("id") for record in self._cache}
+            self._cache_stamp = stamp
+        return self._cache
+
+    def _write(self, data, raw=None):
+        """Replace the history with ``data``; ``raw`` is its already-encoded form, if known."""
+        if raw is None:
+            raw = [self.codec.encode_record(record) for record in data]
+        fd, tmp_path = tempfile.mkstemp(dir=self.path.parent, prefix=self.path.name, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(raw, f, indent=None if self.codec.compresses else 2)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        self._raw = raw
+        self._cache = data
+        self._ids = {record.get("id") for record in data}
+        self._cache_stamp = self._stamp()
+
+    def load(self) -> list:
+        with self.locked():
+            return list(self._records())
+
+    def __contains__(self, interaction_id) -> bool:
+        with self.locked():
+            self._records()
+            return interaction_id in self._ids
+
+    def since(self, cursor: int) -> tuple:
+        """Interactions appended after ``cursor`` and the cursor to resume from."""
+        with self.locked():
+            records = self._records()
+            return records[cursor:], len(records)
+
+    def append(self, entries) -> list:
+        """Assign ids to ``entries`` and append them to the history."""
+        for entry in entries:
+            entry.setdefault("id", uuid.uuid4().hex)
+        with self.locked():
+            data = self._records() + list(entries)
+            # Only the new entries are encoded; the rest is already on disk.
+            raw = self._raw + [self.codec.encode_record(entry) for entry in entries]
+            self._write(data, raw)
+        return entries
+
+    def rewrite(self, transform):
+        """Replace the history with ``transform(records)`` under the lock."""
+        with self.locked():
+            data = transform(list(self._records()))
+            self._write(data)
+        return data
+
+    # ----------------------------------------------
+    # Ratings
+    # ----------------------------------------------
+    def add_rating(self, interaction_id: str, rating: str) -> dict:
+        """Append a rating; raises KeyError if ``interaction_id`` is not in the history."""
+        if rating not in VALID_RATINGS:
+            raise ValueError(f"Rating must be one of {', '.join(VALID_RATINGS)}")
+        record = {
+            "interaction_id": interaction_id,
+            "rating": rating,
+            "timestamp": datetime.now().isoformat(),
+        }
+        with self.locked():
+            if interaction_id not in self:
+                raise KeyError(interaction_id)
+            with open(self.ratings_path, "a") as f:
+                f.write(json.dumps(record) + "\n")
+        return record
+
+    def load_ratings(self) -> dict:
+        """Latest rating per interaction id."""
+        return load_ratings(self.ratings_path)
+
+    def ratings_since(self, offset: int) -> tuple:
+        """Ratings appended after byte ``offset`` and the offset to resume from."""
+        ratings = {}
+        if not self.ratings_path.exists():
+            return ratings, 0
+        with open(self.ratings_path, "rb") as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # incomplete line; pick it up next time
+                offset += len(line)
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                ratings[record["interaction_id"]] = record["rating"]
+        return ratings, offset
+
+    def load_with_ratings(self) -> list:
+        return attach_ratings(self.load(), self.load_ratings())
+
+
+def load_ratings(ratings_path=RATINGS_FILE) -> dict:
+    ratings = {}
+    if os.path.exists(ratings_path):
+        with open(ratings_path, "r") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # torn final line from an interrupted writer
+                ratings[record["interaction_id"]] = record["rating"]
+    return ratings
+
+
+def attach_ratings(data: list, ratings: dict) -> list:
+    """Copy of ``data`` with ``user_rating`` set on each rated interaction."""
+    rated = []
+    for entry in data:
+        rating = ratings.get(entry.get("id"))
+        rated.append(entry if rating is None else {**entry, "user_rating": rating})
+    return rated
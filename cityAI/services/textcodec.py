@@ -0,0 +1,115 @@
+import base64
+import os
+from pathlib import Path
+
+try:
+    import zstandard
+except ImportError:  # compression is optional; plain records need nothing extra
+    zstandard = None
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+DICT_DIR = DATA_DIR / "zdict"
+TEXT_FIELDS = ("user_query", "reply")
+
+
+def is_compressed(value) -> bool:
+    """Compressed fields are stored as ``{"zstd": "<base64 frame>"}``; plain text is a str."""
+    return isinstance(value, dict) and "zstd" in value
+
+
+def train_dictionary(samples, size=16 * 1024, dict_dir=DICT_DIR) -> Path:
+    """Train a zstd dictionary on ``samples`` (strings) and save it as ``<dict id>.zdict``."""
+    if zstandard is None:
+        raise RuntimeError("Training a dictionary requires the zstandard package")
+    dictionary = zstandard.train_dictionary(size, [s.encode("utf-8") for s in samples])
+    dict_dir = Path(dict_dir)
+    dict_dir.mkdir(parents=True, exist_ok=True)
+    path = dict_dir / f"{dictionary.dict_id()}.zdict"
+    path.write_bytes(dictionary.as_bytes())
+    return path
+
+
+def latest_dictionary(dict_dir=DICT_DIR):
+    paths = sorted(Path(dict_dir).glob("*.zdict"), key=lambda p: p.stat().st_mtime)
+    return paths[-1] if paths else None
+
+
+def default_codec():
+    """Compressing codec if STORE_COMPRESSION=zstd, else a decode-only one."""
+    if os.getenv("STORE_COMPRESSION", "").lower() == "zstd":
+        return TextCodec.latest()
+    return TextCodec()
+
+
+class TextCodec:
+    """Encode/decode the text fields of interaction records with zstd.
+
+    Frames record the id of the dictionary they were compressed with, and
+    every dictionary ever trained stays in ``dict_dir``, so records written
+    with an older dictionary keep decoding after a retrain. A codec built
+    without ``dictionary_path`` only decodes; records pass through as-is.
+    A field is kept as plain text whenever compressing it would not save
+    space (short queries usually).
+    """
+
+    def __init__(self, dictionary_path=None, dict_dir=DICT_DIR, level=9, fields=TEXT_FIELDS):
+        self.dict_dir = Path(dict_dir)
+        self.level = level
+        self.fields = fields
+        self._decompressors = {}
+        self._compressor = None
+        self.dict_id = None
+        if dictionary_path is not None:
+            if zstandard is None:
+                raise RuntimeError("Text compression requires the zstandard package")
+            dictionary = zstandard.ZstdCompressionDict(Path(dictionary_path).read_bytes())
+            self.dict_id = dictionary.dict_id()
+            self._compressor = zstandard.ZstdCompressor(level=level, dict_data=dictionary)
+
+    @classmethod
+    def latest(cls, dict_dir=DICT_DIR, **kwargs):
+        """Codec compressing with the newest trained dictionary (decode-only if there is none)."""
+        return cls(latest_dictionary(dict_dir), dict_dir, **kwargs)
+
+    @property
+    def compresses(self) -> bool:
+        return self._compressor is not None
+
+    def _decompressor(self, dict_id):
+        if dict_id not in self._decompressors:
+            if zstandard is None:
+                raise RuntimeError("Reading compressed interactions requires the zstandard package")
+            if dict_id:
+                path = self.dict_dir / f"{dict_id}.zdict"
+                dictionary = zstandard.ZstdCompressionDict(path.read_bytes())
+                self._decompressors[dict_id] = zstandard.ZstdDecompressor(dict_data=dictionary)
+            else:
+                self._decompressors[dict_id] = zstandard.ZstdDecompressor()
+        return self._decompressors[dict_id]
+
+    def encode(self, text):
+        if not self.compresses or not isinstance(text, str):
+            return text
+        raw = text.encode("utf-8")
+        encoded = base64.b64encode(self._compressor.compress(raw)).decode("ascii")
+        return {"zstd": encoded} if len(encoded) + 12 < len(raw) else text
+
+    def decode(self, value):
+        if not is_compressed(value):
+            return value
+        frame = base64.b64decode(value["zstd"])
+        dict_id = zstandard.get_frame_parameters(frame).dict_id if zstandard else None
+        return self._decompressor(dict_id).decompress(frame).decode("utf-8")
+
+    def encode_record(self, record: dict) -> dict:
+        if not self.compresses:
+            return record
+        return {k: self.encode(v) if k in self.fields else v for k, v in record.items()}
+
+    def decode_record(self, record: dict) -> dict:
+        if not any(is_compressed(record.get(field)) for field in self.fields):
+            return record
+        return {k: self.decode(v) if k in self.fields else v for k, v in record.items()}
+
+    def decode_records(self, records: list) -> list:
+        return [self.decode_record(record) for record in records]
@@ -0,0 +1,226 @@
+import contextvars
+import itertools
+import json
+import os
+import threading
+import time
+import uuid
+import zlib
+from datetime import datetime
+from pathlib import Path
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+TRACE_FILE = DATA_DIR / "traces.jsonl"
+REQUEST_ID_HEADER = "X-Request-ID"
+SAMPLED_HEADER = "X-Trace-Sampled"
+
+_trace = contextvars.ContextVar("trace", default=None)
+_parent = contextvars.ContextVar("trace_parent", default=None)
+
+
+def new_request_id() -> str:
+    return uuid.uuid4().hex
+
+
+class FileExporter:
+    """Append one JSON line per finished trace, rotating to ``<file>.1`` at ``max_bytes``."""
+
+    def __init__(self, path=TRACE_FILE, max_bytes=10 * 2 ** 20):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def export(self, trace: dict):
+        line = json.dumps(trace, default=str) + "\n"
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            if self.path.exists() and self.path.stat().st_size + len(line) > self.max_bytes:
+                os.replace(self.path, self.path.with_name(self.path.name + ".1"))
+            with open(self.path, "a") as f:
+                f.write(line)
+
+
+class Trace:
+    """Spans recorded for one sampled request."""
+
+    def __init__(self, request_id, name, exporter):
+        self.request_id = request_id
+        self.name = name
+        self.exporter = exporter
+        self.attrs = {}
+        self.spans = []
+        self.error = None
+        self.started_at = datetime.now().isoformat()
+        self._started = time.perf_counter()
+        self._ids = itertools.count(1)
+
+    def finish(self, error=None):
+        error = error or self.error
+        self.exporter.export({
+            "request_id": self.request_id,
+            "name": self.name,
+            "start": self.started_at,
+            "duration_ms": round((time.perf_counter() - self._started) * 1000, 3),
+            "status": "error" if error else "ok",
+            "error": repr(error) if error else None,
+            "attrs": self.attrs,
+            "spans": self.spans,
+        })
+
+
+class Span:
+    """One timed pipeline stage; nested spans record it as their parent."""
+
+    __slots__ = ("trace", "name", "attrs", "id", "parent", "_started", "_token")
+
+    def __init__(self, trace, name, attrs):
+        self.trace = trace
+        self.name = name
+        self.attrs = attrs
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        self.id = next(self.trace._ids)
+        self.parent = _parent.get()
+        self._token = _parent.set(self.id)
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        ended = time.perf_counter()
+        _parent.reset(self._token)
+        self.trace.spans.append({
+            "id": self.id,
+            "parent": self.parent,
+            "name": self.name,
+            "start_ms": round((self._started - self.trace._started) * 1000, 3),
+            "duration_ms": round((ended - self._started) * 1000, 3),
+            "attrs": self.attrs,
+            "error": repr(exc) if exc is not None else None,
+        })
+        return False
+
+
+class _NoopSpan:
+    """Returned for requests that are not sampled; every operation does nothing."""
+
+    __slots__ = ()
+
+    def set(self, **attrs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Tracer:
+    """Head-sampled request tracing.
+
+    Whether a request is traced is decided once, when it starts: from the
+    caller's ``X-Trace-Sampled`` header if present, otherwise from a hash of
+    its request id, so every service seeing the same id makes the same
+    choice. Unsampled requests only pay for a context-variable lookup per
+    span. Sampled traces are handed to ``exporter`` when they finish.
+    """
+
+    def __init__(self, sample_rate=0.0, exporter=None):
+        self.sample_rate = sample_rate
+        self.exporter = exporter or FileExporter()
+
+    def should_sample(self, request_id: str) -> bool:
+        if self.sample_rate <= 0:
+            return False
+        return zlib.crc32(request_id.encode("utf-8")) % 10000 < self.sample_rate * 10000
+
+    def start(self, name, request_id, sampled=None):
+        """Begin ``request_id``'s trace in the current context; returns a token for ``finish``."""
+        if sampled is None:
+            sampled = self.should_sample(request_id)
+        return _trace.set(Trace(request_id, name, self.exporter) if sampled else None)
+
+    def finish(self, token, error=None):
+        trace = _trace.get()
+        _trace.reset(token)
+        if trace is not None:
+            trace.finish(error)
+
+    def detach(self, token):
+        """Leave the current context without finishing its trace; returns the trace.
+
+        For streamed responses, whose body runs after the request handler
+        returns: pass the trace to ``stream`` to record spans and finish it
+        once the body has been sent.
+        """
+        trace = _trace.get()
+        _trace.reset(token)
+        return trace
+
+
+def stream(trace, iterable):
+    """Yield from ``iterable`` inside ``trace``, finishing the trace when it ends.
+
+    ``trace`` is made current around each step rather than for the whole
+    stream, since the server may resume the body in a different context.
+    """
+    iterator = iter(iterable)
+    error = None
+    try:
+        while True:
+            token = _trace.set(trace)
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            except Exception as e:
+                error = e
+                raise
+            finally:
+                _trace.reset(token)
+            yield item
+    finally:
+        if hasattr(iterator, "close"):
+            iterator.close()
+        if trace is not None:
+            trace.finish(error)
+
+
+def span(name, **attrs):
+    """Time a pipeline stage of the current request (a no-op if it is not sampled)."""
+    trace = _trace.get()
+    if trace is None:
+        return NOOP_SPAN
+    return Span(trace, name, attrs)
+
+
+def current():
+    """The current request's trace, or None if it is not sampled."""
+    return _trace.get()
+
+
+def annotate(**attrs):
+    """Attach attributes to the current request's trace."""
+    trace = _trace.get()
+    if trace is not None:
+        trace.attrs.update(attrs)
+
+
+def record_error(error):
+    """Mark the current request's trace as failed."""
+    trace = _trace.get()
+    if trace is not None:
+        trace.error = error
+
+
+def parse_sampled(value):
+    """``X-Trace-Sampled`` header value -> True/False, or None to let the tracer decide."""
+    if value is None:
+        return None
+    return value.strip().lower() in ("1", "true", "yes")
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Modules are imported as top-level packages (services, analysis) from cityAI/.
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,119 @@
+import threading
+import time
+
+import pytest
+
+from services.admission import AdmissionController, AdmissionRejected
+
+
+def hold_slot(controller, release, **kwargs):
+    """Occupy one worker slot in a background thread until ``release`` is set."""
+    entered = threading.Event()
+
+    def run():
+        with controller.admit(**kwargs):
+            entered.set()
+            release.wait(5)
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    assert entered.wait(5)
+    return thread
+
+
+def test_admits_immediately_when_a_slot_is_free():
+    controller = AdmissionController(max_concurrency=1)
+    with controller.admit() as queue_wait:
+        assert queue_wait < 0.1
+        assert controller.metrics()["inflight"] == 1
+    assert controller.metrics()["inflight"] == 0
+    assert controller.metrics()["admitted"] == 1
+
+
+def test_rejects_when_projected_wait_exceeds_deadline():
+    controller = AdmissionController(max_concurrency=1, initial_service_time=5.0)
+    release = threading.Event()
+    thread = hold_slot(controller, release)
+    try:
+        with pytest.raises(AdmissionRejected) as excinfo:
+            with controller.admit(deadline=time.monotonic() + 1.0):
+                pass
+        assert excinfo.value.reason == "projected wait exceeds deadline"
+        assert excinfo.value.retry_after >= 5
+    finally:
+        release.set()
+        thread.join()
+    assert controller.metrics()["rejected"] == 1
+
+
+def test_rejects_when_queue_is_full():
+    controller = AdmissionController(max_concurrency=1, max_queue=1, max_wait=60)
+    release = threading.Event()
+    running = hold_slot(controller, release)
+
+    def wait_in_queue():
+        with controller.admit():
+            pass
+
+    queued = threading.Thread(target=wait_in_queue, daemon=True)
+    queued.start()
+    while controller.metrics()["queued"] < 1:
+        time.sleep(0.005)
+    try:
+        with pytest.raises(AdmissionRejected) as excinfo:
+            with controller.admit():
+                pass
+        assert excinfo.value.reason == "queue full"
+    finally:
+        release.set()
+        running.join()
+        queued.join()
+
+
+def test_deadline_expiring_in_queue_rejects_and_leaves_queue():
+    # A tiny service-time estimate lets the request queue, then its deadline passes.
+    controller = AdmissionController(max_concurrency=1, initial_service_time=0.01)
+    release = threading.Event()
+    thread = hold_slot(controller, release)
+    try:
+        with pytest.raises(AdmissionRejected) as excinfo:
+            with controller.admit(deadline=time.monotonic() + 0.1):
+                pass
+        assert excinfo.value.reason == "deadline expired in queue"
+        metrics = controller.metrics()
+        assert metrics["expired"] == 1
+        assert metrics["queued"] == 0
+    finally:
+        release.set()
+        thread.join()
+
+
+def test_lower_priority_value_runs_first():
+    controller = AdmissionController(max_concurrency=1, max_wait=60, initial_service_time=0.01)
+    release = threading.Event()
+    holder = hold_slot(controller, release)
+    order = []
+
+    def worker(priority, label):
+        with controller.admit(priority=priority):
+            order.append(label)
+
+    batch = threading.Thread(target=worker, args=(1, "batch"))
+    batch.start()
+    while controller.metrics()["queued"] < 1:
+        time.sleep(0.005)
+    chat = threading.Thread(target=worker, args=(0, "chat"))
+    chat.start()
+    while controller.metrics()["queued"] < 2:
+        time.sleep(0.005)
+    release.set()
+    for thread in (holder, batch, chat):
+        thread.join(5)
+    assert order == ["chat", "batch"]
+
+
+def test_service_time_tracks_admitted_work():
+    controller = AdmissionController(initial_service_time=5.0, ewma_alpha=0.5)
+    with controller.admit():
+        pass
+    assert controller.service_time < 3.0
@@ -0,0 +1,96 @@
+import pytest
+
+from services.breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpen
+
+
+def make_breaker(**kwargs):
+    params = dict(failure_threshold=0.5, window_size=4, min_calls=4, slow_call_seconds=5.0, open_seconds=60.0)
+    params.update(kwargs)
+    return CircuitBreaker("test", **params)
+
+
+def fail(breaker, times=1):
+    for _ in range(times):
+        breaker.record(breaker._acquire(), 0.1, False)
+
+
+def succeed(breaker, times=1, latency=0.1):
+    for _ in range(times):
+        breaker.record(breaker._acquire(), latency, True)
+
+
+def expire_open_period(breaker):
+    breaker._opened_at -= breaker.open_seconds + 1
+
+
+def test_stays_closed_below_min_calls():
+    breaker = make_breaker()
+    fail(breaker, 3)
+    assert breaker.state == CLOSED
+
+
+def test_opens_at_failure_threshold_and_rejects():
+    breaker = make_breaker()
+    succeed(breaker, 2)
+    fail(breaker, 2)
+    assert breaker.state == OPEN
+    assert not breaker.available()
+    with pytest.raises(CircuitOpen) as excinfo:
+        with breaker.guard():
+            pass
+    assert excinfo.value.retry_after > 0
+    assert breaker.snapshot()["rejected"] == 1
+
+
+def test_slow_successes_count_as_failures():
+    breaker = make_breaker()
+    succeed(breaker, 4, latency=6.0)
+    assert breaker.state == OPEN
+    assert breaker.snapshot()["slow_calls"] == 4
+    assert breaker.snapshot()["failures"] == 0
+
+
+def test_half_open_after_open_period_then_closes_on_success():
+    breaker = make_breaker()
+    fail(breaker, 4)
+    expire_open_period(breaker)
+    assert breaker.available()
+
+    with breaker.guard():
+        assert breaker.state == HALF_OPEN
+        assert not breaker.available()  # the single probe slot is taken
+    assert breaker.state == CLOSED
+    assert breaker.snapshot()["window_failure_rate"] == 0.0
+
+
+def test_failed_probe_reopens():
+    breaker = make_breaker()
+    fail(breaker, 4)
+    expire_open_period(breaker)
+    with pytest.raises(RuntimeError):
+        with breaker.guard():
+            raise RuntimeError("still down")
+    assert breaker.state == OPEN
+    assert not breaker.available()
+
+
+def test_half_open_needs_all_probes_to_pass():
+    breaker = make_breaker(half_open_probes=2)
+    fail(breaker, 4)
+    expire_open_period(breaker)
+    succeed(breaker)
+    assert breaker.state == HALF_OPEN
+    succeed(breaker)
+    assert breaker.state == CLOSED
+
+
+def test_transitions_are_counted():
+    breaker = make_breaker()
+    fail(breaker, 4)
+    expire_open_period(breaker)
+    succeed(breaker)
+    assert breaker.snapshot()["transitions"] == {
+        "closed->open": 1,
+        "open->half_open": 1,
+        "half_open->closed": 1,
+    }
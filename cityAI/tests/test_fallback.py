@@ -0,0 +1,38 @@
+from services.fallback import AnswerIndex
+
+
+def record(interaction_id, query, reply):
+    return {"id": interaction_id, "user_query": query, "reply": reply}
+
+
+def test_best_returns_closest_past_answer():
+    index = AnswerIndex(min_similarity=0.3)
+    index.add([
+        record("1", "How do I pay my property tax online?", "Use the property tax portal."),
+        record("2", "Streetlight not working on my road", "Report it to the electrical wing."),
+    ])
+    _, reply, similarity = index.best("how to pay property tax")
+    assert reply == "Use the property tax portal."
+    assert 0.3 <= similarity <= 1.0
+    assert index.best("completely unrelated garbage words") is None
+    assert index.stats() == {"answers": 2, "served": 1, "misses": 1}
+
+
+def test_skips_error_replies_and_negatively_rated_answers():
+    index = AnswerIndex(skip_prefixes=("⚠️",))
+    index.add(
+        [
+            record("1", "water supply timings", "⚠️ Groq API error"),
+            record("2", "garbage collection schedule", "Collected daily at 7am."),
+        ],
+        ratings={"2": "NEGATIVE"},
+    )
+    assert index.stats()["answers"] == 0
+
+
+def test_discard_removes_answer():
+    index = AnswerIndex(min_similarity=0.3)
+    index.add([record("1", "birth certificate application", "Apply at the registrar office.")])
+    index.discard("1")
+    assert index.best("birth certificate application") is None
+    assert index.stats()["answers"] == 0
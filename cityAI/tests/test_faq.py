@@ -0,0 +1,69 @@
+import pytest
+
+from services.faq import FaqIndex, is_direct_answer
+
+ANSWER_THRESHOLD = 0.45  # FAQ_ANSWER_THRESHOLD default in app/api.py
+
+
+@pytest.fixture(scope="module")
+def index():
+    return FaqIndex.from_dir()  # the shipped data/faq corpus
+
+
+@pytest.mark.parametrize("query", ["how do I pay", "tax", "water", "death", "certificate", "website"])
+def test_short_queries_are_not_answered_directly(index, query):
+    hits = index.search(query)
+    assert hits
+    assert not is_direct_answer(hits[0], ANSWER_THRESHOLD)
+
+
+@pytest.mark.parametrize("query, question", [
+    ("How do I pay property tax online?", "How do I pay property tax online?"),
+    ("how to get a death certificate", "How do I get a death certificate?"),
+    ("report a broken street light", "How do I report a broken street light?"),
+    ("no water supply in my area", "There is no water supply in my area. Whom should I contact?"),
+    ("penalty for late property tax payment", "What is the penalty for late payment of property tax?"),
+])
+def test_specific_queries_are_answered_directly(index, query, question):
+    best = index.search(query)[0]
+    assert best["question"] == question
+    assert is_direct_answer(best, ANSWER_THRESHOLD)
+
+
+def test_confidence_is_normalised_and_ranked(index):
+    hits = index.search("how do I pay property tax", k=5)
+    confidences = [hit["confidence"] for hit in hits]
+    assert confidences == sorted(confidences, reverse=True)
+    assert all(0.0 <= c < 1.0 for c in confidences)
+
+
+def test_partial_question_coverage_lowers_confidence(index):
+    partial = index.search("pay property tax")[0]
+    full = index.search("pay property tax online")[0]
+    assert partial["question"] == full["question"] == "How do I pay property tax online?"
+    assert partial["confidence"] < full["confidence"]
+
+
+def test_off_topic_query_has_low_confidence(index):
+    hits = index.search("best biryani restaurant near the railway station")
+    assert not hits or hits[0]["confidence"] < 0.25
+
+
+def test_matched_terms_counts_distinct_query_terms():
+    index = FaqIndex([
+        {"question": "How do I renew a trade licence?", "answer": "Apply online before expiry."},
+        {"question": "How do I get a ration card?", "answer": "Visit the civil supplies office."},
+    ])
+    best = index.search("renew trade licence licence")[0]
+    assert best["matched_terms"] == 3
+    assert is_direct_answer(best, threshold=0.0, min_terms=3)
+    assert not is_direct_answer(best, threshold=0.0, min_terms=4)
+
+
+def test_stats_count_lookups(index):
+    before = index.stats()["lookups"]
+    index.search("ration card")
+    index.record(answered=True, grounded=False)
+    stats = index.stats()
+    assert stats["lookups"] == before + 1
+    assert stats["answered"] >= 1
@@ -0,0 +1,105 @@
+import pytest
+
+from services.router import BackendStats, LatencyRouter, parse_cost_weights
+
+
+def make_router(local=5.0, groq=2.0, groq_weight=0.2, **kwargs):
+    kwargs.setdefault("probe_interval", 0)
+    return LatencyRouter(
+        [
+            BackendStats("local", 0.0, initial_latency=local),
+            BackendStats("groq", groq_weight, initial_latency=groq),
+        ],
+        **kwargs,
+    )
+
+
+def test_chooses_cheapest_backend():
+    router = make_router()
+    assert router.choose(["local", "groq"]) == "groq"
+    assert router.current == "groq"
+    assert router.switches == 1
+
+
+def test_no_candidates_raises():
+    with pytest.raises(ValueError):
+        make_router().choose([])
+
+
+def test_first_measurement_replaces_prior():
+    router = make_router(local=30.0)
+    router.record("local", 0.8, True)
+    assert router.stats["local"].latency == pytest.approx(0.8)
+    router.record("local", 1.8, True)
+    assert router.stats["local"].latency == pytest.approx(0.8 + 0.2 * 1.0)
+
+
+def test_hysteresis_keeps_current_backend_until_clearly_worse():
+    router = make_router(local=1.0, groq=1.0, groq_weight=0.0, hysteresis=0.25)
+    router.current = "local"
+    router.stats["local"].latency = 1.2  # within 25% of groq
+    assert router.choose(["local", "groq"]) == "local"
+    assert router.switches == 0
+
+    router.stats["local"].latency = 1.3  # more than 25% worse
+    assert router.choose(["local", "groq"]) == "groq"
+    assert router.current == "groq"
+    assert router.switches == 1
+
+
+def test_errors_inflate_expected_cost():
+    router = make_router(local=1.0, groq=1.0, groq_weight=0.0)
+    for _ in range(3):
+        router.record("local", 1.0, False)
+    assert router.stats["local"].errors == 3
+    assert router.choose(["local", "groq"]) == "groq"
+
+
+def test_idle_backend_is_probed_and_can_win_back_traffic():
+    router = make_router(probe_interval=60.0)
+    latencies = {"local": 0.8, "groq": 1.5}
+    assert router.choose(["local", "groq"]) == "groq"
+    router.record("groq", latencies["groq"], True)
+
+    router.stats["local"].last_used -= 61  # local has not been called for a minute
+    assert router.choose(["local", "groq"]) == "local"
+    assert router.probes == 1
+    assert router.current == "groq"  # a probe does not switch by itself
+    router.record("local", latencies["local"], True)
+
+    assert router.choose(["local", "groq"]) == "local"
+    assert router.current == "local"
+
+
+def test_probe_interval_zero_disables_probing():
+    router = make_router(probe_interval=0)
+    router.stats["local"].last_used -= 3600
+    for _ in range(5):
+        assert router.choose(["local", "groq"]) == "groq"
+    assert router.probes == 0
+
+
+def test_track_counts_exceptions_as_errors():
+    router = make_router()
+    with pytest.raises(RuntimeError):
+        with router.track("groq"):
+            raise RuntimeError("boom")
+    stats = router.stats["groq"]
+    assert (stats.calls, stats.errors, stats.inflight) == (1, 1, 0)
+
+
+def test_parse_cost_weights():
+    assert parse_cost_weights("local=0, groq=0.5,") == {"local": 0.0, "groq": 0.5}
+
+
+def test_unmeasured_call_counts_as_inflight_but_keeps_latency():
+    router = make_router(local=1.5)
+    assert router.choose(["local", "groq"]) == "local"
+    with router.track("local", measure=False):
+        assert router.stats["local"].inflight == 1
+        assert router.choose(["local", "groq"]) == "groq"  # local is busy with the batch
+    stats = router.stats["local"]
+    assert (stats.calls, stats.inflight, stats.latency) == (1, 0, 1.5)
+
+    router.record("local", 0.5, True)  # the first measured call still replaces the prior
+    assert stats.latency == pytest.approx(0.5)
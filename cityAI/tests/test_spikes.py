@@ -0,0 +1,120 @@
+from datetime import datetime, timedelta
+
+from analysis.spikes import ALL, SpikeDetector
+
+START = datetime(2025, 1, 6, 0, 0)
+
+
+def feed(detector, hours, negatives, total=10, category="Water", start=START):
+    """``hours`` hourly windows with ``negatives`` negative interactions out of ``total`` each."""
+    raised = []
+    for hour in range(hours):
+        at = start + timedelta(hours=hour, minutes=1)
+        for i in range(total):
+            raised += detector.add("NEGATIVE" if i < negatives else "POSITIVE", category, at)
+    return raised
+
+
+def make_detector(**kwargs):
+    params = dict(window_minutes=60, warmup=24, min_negative=3, per_category=True)
+    params.update(kwargs)
+    return SpikeDetector(**params)
+
+
+def test_steady_baseline_raises_no_alert():
+    detector = make_detector()
+    assert feed(detector, 72, negatives=1) == []
+    detector.tick(START + timedelta(hours=72, minutes=5))
+    status = detector.status()
+    assert status["active"] == []
+    assert not status["series"][ALL]["warming_up"]
+    assert 0.9 < status["series"][ALL]["baseline_negative"] < 1.1
+
+
+def test_no_alerts_while_warming_up():
+    detector = make_detector(warmup=24)
+    feed(detector, 5, negatives=1)
+    assert feed(detector, 5, negatives=9, start=START + timedelta(hours=5)) == []
+
+
+def test_spike_alarms_then_clears():
+    detector = make_detector()
+    feed(detector, 48, negatives=1)
+    raised = feed(detector, 3, negatives=9, start=START + timedelta(hours=48))
+    raised += detector.tick(START + timedelta(hours=51, minutes=5))
+    assert {alert["key"] for alert in raised} == {ALL, "Water"}
+    assert sorted(detector.status()["active"]) == [ALL, "Water"]
+    assert detector.status()["series"][ALL]["alarm_since"] is not None
+
+    # Back to normal: the capped CUSUM drains and the alarm clears.
+    feed(detector, 12, negatives=1, start=START + timedelta(hours=51))
+    detector.tick(START + timedelta(hours=63, minutes=5))
+    assert detector.status()["active"] == []
+
+
+def test_sustained_spike_alerts_once_and_stays_in_alarm():
+    detector = make_detector()
+    feed(detector, 48, negatives=1)
+    raised = feed(detector, 10, negatives=9, start=START + timedelta(hours=48))
+    detector.tick(START + timedelta(hours=58, minutes=5))
+    assert [alert["key"] for alert in raised].count(ALL) == 1
+    assert ALL in detector.status()["active"]
+    # The surge is kept out of the baseline.
+    assert detector.status()["series"][ALL]["baseline_negative"] < 2
+
+
+def test_small_counts_do_not_alarm():
+    detector = make_detector(min_negative=3)
+    feed(detector, 48, negatives=0, total=2)
+    raised = feed(detector, 3, negatives=2, total=2, start=START + timedelta(hours=48))
+    raised += detector.tick(START + timedelta(hours=51, minutes=5))
+    assert raised == []
+
+
+def test_long_gap_is_bounded_by_max_gap():
+    detector = make_detector(max_gap=10)
+    feed(detector, 30, negatives=1)
+    detector.tick(START + timedelta(days=365))
+    assert detector.series[ALL].windows <= 30 + 10 + 1
+
+
+def test_save_load_round_trip(tmp_path):
+    detector = make_detector()
+    feed(detector, 48, negatives=1)
+    feed(detector, 3, negatives=9, start=START + timedelta(hours=48))
+    path = tmp_path / "spike_state.json"
+    detector.save(path)
+
+    restored = SpikeDetector.load(path)
+    assert restored.params() == detector.params()
+    assert restored.status() == detector.status()
+
+
+def test_load_without_state_returns_fresh_detector(tmp_path):
+    detector = SpikeDetector.load(tmp_path / "missing.json", window_minutes=30)
+    assert detector.window_minutes == 30
+    assert detector.series == {}
+
+
+def test_replay_matches_online_updates_and_skips_bad_records():
+    records = [
+        {"sentiment": "NEGATIVE" if i % 10 < 9 and i >= 480 else "POSITIVE", "category": "Roads",
+         "timestamp": (START + timedelta(minutes=6 * i)).isoformat()}
+        for i in range(510)
+    ]
+    records.insert(3, {"sentiment": "NEGATIVE", "category": "Roads"})  # no timestamp
+    records.insert(4, {"sentiment": "NEGATIVE", "timestamp": "not a date"})
+
+    replayed, raised = SpikeDetector.replay(records, warmup=24)
+    online = SpikeDetector(warmup=24)
+    for record in records:
+        if record.get("timestamp", "").startswith("2025"):
+            online.add(record["sentiment"], record["category"], record["timestamp"])
+    assert replayed.status() == online.status()
+    assert raised and raised[0]["key"] in (ALL, "Roads")
+
+
+def test_backtest_names_an_env_setting_for_every_parameter():
+    from scripts.backtest_spikes import ENV_NAMES
+
+    assert set(ENV_NAMES) == set(SpikeDetector().params())
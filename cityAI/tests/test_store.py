@@ -0,0 +1,106 @@
+import json
+
+import pytest
+
+from services.store import InteractionStore, attach_ratings
+from services.textcodec import TextCodec
+
+
+@pytest.fixture
+def store(tmp_path):
+    return InteractionStore(tmp_path / "feedback.json", tmp_path / "ratings.jsonl", codec=TextCodec())
+
+
+def entry(query, sentiment="NEUTRAL"):
+    return {"user_query": query, "reply": f"Answer to {query}", "sentiment": sentiment}
+
+
+def test_append_assigns_ids_and_persists(store):
+    added = store.append([entry("water"), entry("roads")])
+    assert all(e["id"] for e in added)
+    reopened = InteractionStore(store.path, store.ratings_path, codec=TextCodec())
+    assert [e["user_query"] for e in reopened.load()] == ["water", "roads"]
+
+
+def test_since_returns_only_new_records_and_next_cursor(store):
+    store.append([entry("a"), entry("b")])
+    records, cursor = store.since(0)
+    assert [r["user_query"] for r in records] == ["a", "b"]
+    assert cursor == 2
+
+    store.append([entry("c")])
+    records, cursor = store.since(cursor)
+    assert [r["user_query"] for r in records] == ["c"]
+    assert store.since(cursor) == ([], 3)
+
+
+def test_since_sees_writes_from_another_process(store):
+    store.append([entry("a")])
+    other = InteractionStore(store.path, store.ratings_path, codec=TextCodec())
+    other.append([entry("b")])
+    records, _ = store.since(1)
+    assert [r["user_query"] for r in records] == ["b"]
+
+
+def test_rating_round_trip(store):
+    first, second = store.append([entry("a"), entry("b")])
+    store.add_rating(first["id"], "NEGATIVE")
+    store.add_rating(first["id"], "POSITIVE")  # latest rating wins
+    assert store.load_ratings() == {first["id"]: "POSITIVE"}
+
+    rated = store.load_with_ratings()
+    assert rated[0]["user_rating"] == "POSITIVE"
+    assert "user_rating" not in rated[1]
+
+
+def test_ratings_since_resumes_from_offset(store):
+    first, second = store.append([entry("a"), entry("b")])
+    store.add_rating(first["id"], "POSITIVE")
+    ratings, offset = store.ratings_since(0)
+    assert ratings == {first["id"]: "POSITIVE"}
+
+    store.add_rating(second["id"], "NEGATIVE")
+    ratings, offset = store.ratings_since(offset)
+    assert ratings == {second["id"]: "NEGATIVE"}
+    assert store.ratings_since(offset) == ({}, offset)
+
+
+def test_ratings_since_skips_incomplete_line(store):
+    (first,) = store.append([entry("a")])
+    store.add_rating(first["id"], "POSITIVE")
+    _, offset = store.ratings_since(0)
+    with open(store.ratings_path, "a") as f:
+        f.write(json.dumps({"interaction_id": first["id"], "rating": "NEGATIVE"}))  # no newline yet
+    assert store.ratings_since(offset) == ({}, offset)
+
+
+def test_rating_rejects_unknown_interaction_and_bad_value(store):
+    (first,) = store.append([entry("a")])
+    with pytest.raises(KeyError):
+        store.add_rating("bogus", "POSITIVE")
+    with pytest.raises(ValueError):
+        store.add_rating(first["id"], "MEH")
+    assert not store.ratings_path.exists()
+
+
+def test_attach_ratings_leaves_input_untouched():
+    data = [{"id": "1"}, {"id": "2"}]
+    assert attach_ratings(data, {"2": "NEGATIVE"}) == [{"id": "1"}, {"id": "2", "user_rating": "NEGATIVE"}]
+    assert data == [{"id": "1"}, {"id": "2"}]
+
+
+def test_compressed_records_round_trip(tmp_path):
+    pytest.importorskip("zstandard")
+    from services.textcodec import train_dictionary
+
+    samples = [f"How do I report a broken streetlight on road {i}?" for i in range(200)]
+    dictionary = train_dictionary(samples, size=2048, dict_dir=tmp_path / "zdict")
+    codec = TextCodec(dictionary, dict_dir=tmp_path / "zdict")
+    store = InteractionStore(tmp_path / "feedback.json", tmp_path / "ratings.jsonl", codec=codec)
+    long_reply = "Please use the municipal portal to file a streetlight complaint. " * 5
+    store.append([{"user_query": samples[0], "reply": long_reply, "sentiment": "NEUTRAL"}])
+
+    raw = json.loads(store.path.read_text())
+    assert isinstance(raw[0]["reply"], dict)
+    reader = InteractionStore(store.path, store.ratings_path, codec=TextCodec(dict_dir=tmp_path / "zdict"))
+    assert reader.load()[0]["reply"] == long_reply
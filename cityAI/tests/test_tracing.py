@@ -0,0 +1,91 @@
+import contextvars
+
+import pytest
+
+from services import tracing
+from services.tracing import NOOP_SPAN, Tracer
+
+
+class MemoryExporter:
+    def __init__(self):
+        self.traces = []
+
+    def export(self, trace):
+        self.traces.append(trace)
+
+
+def test_unsampled_requests_record_nothing():
+    exporter = MemoryExporter()
+    tracer = Tracer(sample_rate=0.0, exporter=exporter)
+    token = tracer.start("GET /", "abc")
+    assert tracing.span("stage") is NOOP_SPAN
+    tracer.finish(token)
+    assert exporter.traces == []
+
+
+def test_sampling_is_deterministic_per_request_id():
+    tracer = Tracer(sample_rate=0.5, exporter=MemoryExporter())
+    decisions = {rid: tracer.should_sample(rid) for rid in (tracing.new_request_id() for _ in range(200))}
+    assert all(tracer.should_sample(rid) == sampled for rid, sampled in decisions.items())
+    assert 0 < sum(decisions.values()) < 200
+
+
+def test_nested_spans_record_parent_and_errors():
+    exporter = MemoryExporter()
+    tracer = Tracer(sample_rate=1.0, exporter=exporter)
+    token = tracer.start("POST /chat", "abc")
+    with tracing.span("generate"):
+        with pytest.raises(ValueError):
+            with tracing.span("model.local", model="granite"):
+                raise ValueError("boom")
+    tracing.annotate(backend="local")
+    tracer.finish(token)
+
+    (trace,) = exporter.traces
+    inner, outer = trace["spans"]
+    assert (outer["name"], outer["parent"]) == ("generate", None)
+    assert (inner["name"], inner["parent"]) == ("model.local", outer["id"])
+    assert "boom" in inner["error"]
+    assert trace["attrs"] == {"backend": "local"}
+
+
+def test_streamed_body_is_traced_until_it_ends():
+    exporter = MemoryExporter()
+    tracer = Tracer(sample_rate=1.0, exporter=exporter)
+
+    def body():
+        for i in range(2):
+            with tracing.span("chunk", index=i):
+                pass
+            yield f"{i}\n"
+
+    token = tracer.start("POST /chat/batch", "abc")
+    trace = tracer.detach(token)  # request handler returns before the body is sent
+    assert exporter.traces == []
+
+    # The server iterates the body later, here in a fresh context.
+    chunks = contextvars.Context().run(lambda: list(tracing.stream(trace, body())))
+    assert chunks == ["0\n", "1\n"]
+    (exported,) = exporter.traces
+    assert [span["name"] for span in exported["spans"]] == ["chunk", "chunk"]
+    assert exported["status"] == "ok"
+
+
+def test_streamed_body_error_marks_trace_failed():
+    exporter = MemoryExporter()
+    tracer = Tracer(sample_rate=1.0, exporter=exporter)
+
+    def body():
+        yield "partial\n"
+        raise RuntimeError("backend down")
+
+    trace = tracer.detach(tracer.start("POST /chat/batch", "abc"))
+    with pytest.raises(RuntimeError):
+        list(tracing.stream(trace, body()))
+    assert exporter.traces[0]["status"] == "error"
+
+
+def test_parse_sampled():
+    assert tracing.parse_sampled(None) is None
+    assert tracing.parse_sampled("1") is True
+    assert tracing.parse_sampled("false") is False